@@ -1,26 +1,38 @@
-import sys
+from __future__ import annotations
 import fitz
 import re
-import json
-import argparse
+import textwrap
+import orjson
 from docx import Document
-from crewai import Agent, Task, Crew, Process
-from langchain_openai import ChatOpenAI
-from dotenv import load_dotenv
+from env import load_env
 import os
-import datetime
-from IPython.display import Markdown, display
-import uuid
-import requests
-from typing import Dict, List, Any, Optional
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Any, Optional, Final
+from string import Template
 import logging
-import random
+import itertools
+import asyncio
+import threading
+import httpx
+from config import AI_PARAMS, Config
+from collections import defaultdict
+from email.utils import parsedate_to_datetime
+import hashlib
+import sqlite3
+import time
+from functools import lru_cache
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
+
+if TYPE_CHECKING:
+    # crewai and langchain are imported lazily by the factories below
+    from crewai import Agent, Task, Crew
+    from langchain_openai import ChatOpenAI
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-load_dotenv()
+load_env()
 
 class OpenRouterKeyManager:
     """Manages multiple OpenRouter API keys with rotation and fallback"""
@@ -28,7 +40,10 @@ class OpenRouterKeyManager:
     def __init__(self):
         self.keys = []
         self.current_key_index = 0
-        self.failed_keys = set()
+        self.cooldown_until: Dict[int, float] = {}  # key index -> unix time it may be used again
+        self.strikes: Dict[int, int] = {}  # consecutive failures per key, drives the backoff
+        self._key_cycle = None
+        self._lock = threading.Lock()  # guards the cycle and cooldown state, keys are shared across request threads
         
         # Load all available keys
         for i in range(1, 6):
@@ -45,53 +60,130 @@ class OpenRouterKeyManager:
             else:
                 raise ValueError("No OpenRouter API keys found! Please set OPENROUTER_API_KEY_1 through OPENROUTER_API_KEY_5 in your .env file")
         
+        self._key_cycle = itertools.cycle(range(len(self.keys)))
         logger.info(f"Loaded {len(self.keys)} OpenRouter API keys")
     
     def get_current_key(self) -> str:
         """Get the current API key"""
         return self.keys[self.current_key_index]
     
-    def get_random_key(self) -> str:
-        """Get a random API key (excluding failed ones)"""
-        available_keys = [key for i, key in enumerate(self.keys) if i not in self.failed_keys]
-        if not available_keys:
-            # Reset failed keys if all are exhausted
-            self.failed_keys.clear()
-            available_keys = self.keys
-            logger.warning("All keys were marked as failed, resetting failed keys list")
-        
-        return random.choice(available_keys)
+    def get_next_index(self) -> int:
+        """Get the next key index in round-robin order, skipping keys in cooldown"""
+        now = time.time()
+        with self._lock:
+            for _ in range(len(self.keys)):
+                index = next(self._key_cycle)
+                if self.cooldown_until.get(index, 0) <= now:
+                    self.current_key_index = index
+                    return index
+            
+            # Every key is cooling down, use the one that recovers first instead of waiting
+            index = min(range(len(self.keys)), key=lambda index: self.cooldown_until[index])
+            self.current_key_index = index
+        logger.warning(f"All keys are cooling down, using key {index + 1}")
+        return index
     
-    def mark_key_failed(self, key: str):
-        """Mark a key as failed"""
+    def get_next_key(self) -> str:
+        """Get the next API key in round-robin order, skipping keys in cooldown"""
+        return self.keys[self.get_next_index()]
+    
+    def mark_key_failed(self, key: str, retry_after: Optional[float] = None):
+        """Put a key in cooldown for retry_after seconds, or with exponential backoff per repeated failure"""
         try:
             index = self.keys.index(key)
-            self.failed_keys.add(index)
-            logger.warning(f"Marked key {index + 1} as failed")
         except ValueError:
-            pass
+            return
+        
+        with self._lock:
+            strikes = self.strikes.get(index, 0) + 1
+            self.strikes[index] = strikes
+            if retry_after is None:
+                retry_after = min(KEY_COOLDOWN_BASE_SECONDS * 2 ** (strikes - 1), KEY_COOLDOWN_MAX_SECONDS)
+            self.cooldown_until[index] = time.time() + retry_after
+        logger.warning(f"Key {index + 1} in cooldown for {retry_after:.0f}s (failure {strikes})")
+    
+    def mark_key_succeeded(self, index: int):
+        """Reset the backoff of a key after a successful call"""
+        with self._lock:
+            if self.strikes.pop(index, None):
+                self.cooldown_until.pop(index, None)
     
     def rotate_key(self):
         """Move to the next key"""
-        self.current_key_index = (self.current_key_index + 1) % len(self.keys)
-        logger.info(f"Rotated to key {self.current_key_index + 1}")
+        with self._lock:
+            self.current_key_index = index = (self.current_key_index + 1) % len(self.keys)
+        logger.info(f"Rotated to key {index + 1}")
     
     def get_available_key_count(self) -> int:
-        """Get number of available (non-failed) keys"""
-        return len(self.keys) - len(self.failed_keys)
+        """Get number of available (not cooling down) keys"""
+        now = time.time()
+        return sum(1 for index in range(len(self.keys)) if self.cooldown_until.get(index, 0) <= now)
+
+# Key cooldown after a failure, doubled per consecutive failure up to the max
+KEY_COOLDOWN_BASE_SECONDS = 30
+KEY_COOLDOWN_MAX_SECONDS = 600
+
+# HTTP statuses that say the key itself is unusable for now
+_KEY_FAILURE_STATUSES = frozenset({401, 402, 429})
+_TRANSIENT_ERROR_RE = re.compile(r'credits|402|429|authentication', re.IGNORECASE)
+LLM_MAX_ATTEMPTS = int(os.getenv('AI_LLM_MAX_ATTEMPTS', 3))
+
+class TransientLLMError(Exception):
+    """LLM call failure worth retrying on another key: credits, auth, rate limit or server error"""
+
+def _is_transient_error(error: Exception) -> bool:
+    """Classify an LLM call failure as transient from its status code or message"""
+    status = getattr(error, 'status_code', None)
+    if status in _KEY_FAILURE_STATUSES or (isinstance(status, int) and status >= 500):
+        return True
+    return bool(_TRANSIENT_ERROR_RE.search(str(error)))
+
+def _retry_after_seconds(response: Optional[httpx.Response]) -> Optional[float]:
+    """Parse a Retry-After header (seconds or HTTP date) into seconds"""
+    value = response.headers.get('retry-after') if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
 
-# Initialize key manager
-key_manager = OpenRouterKeyManager()
+@lru_cache(maxsize=1)
+def get_key_manager() -> OpenRouterKeyManager:
+    """Key manager, created on first use"""
+    return OpenRouterKeyManager()
 
 # OpenRouter configuration with reliable model
-model_name = 'openai/gpt-3.5-turbo'  # Use GPT-3.5 Turbo (reliable and cost-effective)
+model_name = AI_PARAMS.model  # GPT-3.5 Turbo unless AI_MODEL says otherwise (reliable and cost-effective)
 base_url = "https://openrouter.ai/api/v1"
+temperature = AI_PARAMS.temperature
+
+# Output token budgets per task, sized to each task's JSON schema
+TASK_MAX_TOKENS = {
+    'resume_analysis': 600,
+    'job_analysis': 900,
+    'evaluation': 700,
+    'interview_design': 500,
+    'quality_review': 900,
+}
+DEFAULT_MAX_TOKENS = AI_PARAMS.max_tokens
 
-logger.info(f"Initializing OpenRouter with GPT-3.5 Turbo and {key_manager.get_available_key_count()} available keys")
+@lru_cache(maxsize=1)
+def get_http_clients() -> tuple[httpx.Client, httpx.AsyncClient]:
+    """Shared connection pools so every agent call reuses keep-alive connections to OpenRouter"""
+    http_limits = httpx.Limits(max_keepalive_connections=20, max_connections=50)
+    return httpx.Client(limits=http_limits), httpx.AsyncClient(limits=http_limits)
 
-def get_llm_with_fallback() -> ChatOpenAI:
+def get_llm_with_fallback(max_tokens: int = DEFAULT_MAX_TOKENS, api_key: Optional[str] = None) -> ChatOpenAI:
     """Get LLM instance with automatic key rotation and fallback"""
-    api_key = key_manager.get_random_key()
+    from langchain_openai import ChatOpenAI
+    
+    api_key = api_key or get_key_manager().get_next_key()
+    http_client, http_async_client = get_http_clients()
     
     # Set environment variables for compatibility
     os.environ['OPENAI_API_KEY'] = api_key
@@ -99,11 +191,13 @@ def get_llm_with_fallback() -> ChatOpenAI:
     
     return ChatOpenAI(
         model=model_name,
-        temperature=0.1,
+        temperature=temperature,
         api_key=api_key,
         base_url=base_url,
-        max_tokens=1000,  # Further reduced for memory efficiency
-        request_timeout=120,  # Add timeout
+        max_tokens=max_tokens,
+        request_timeout=AI_PARAMS.timeout,
+        http_client=http_client,
+        http_async_client=http_async_client,
         model_kwargs={
             "response_format": {"type": "json_object"},
             "extra_headers": {
@@ -113,10 +207,108 @@ def get_llm_with_fallback() -> ChatOpenAI:
         }
     )
 
-# Initialize the default LLM
-llm = get_llm_with_fallback()
+@lru_cache(maxsize=None)
+def get_llm(max_tokens: int = DEFAULT_MAX_TOKENS) -> ChatOpenAI:
+    """LLM shared by every agent with the same output budget, created on first use"""
+    logger.info(f"Initializing OpenRouter with GPT-3.5 Turbo and {get_key_manager().get_available_key_count()} available keys")
+    llm = get_llm_with_fallback(max_tokens)
+    logger.info(f"Successfully initialized OpenRouter LLM: {model_name} with max_tokens={max_tokens}")
+    return llm
+
+@lru_cache(maxsize=None)
+def get_llm_for_key(key_index: int, max_tokens: int = DEFAULT_MAX_TOKENS) -> ChatOpenAI:
+    """LLM bound to one API key; every instance shares the same connection pools"""
+    return get_llm_with_fallback(max_tokens, api_key=get_key_manager().keys[key_index])
+
+# Concurrent in-flight requests allowed per API key, so one slow key doesn't hold up the others
+MAX_CONCURRENT_PER_KEY = int(os.getenv('AI_MAX_CONCURRENT_PER_KEY', 4))
+_key_semaphores: Dict[int, asyncio.Semaphore] = {}
+_global_semaphore: Optional[asyncio.Semaphore] = None
+
+class TokenRateLimiter:
+    """Token bucket that holds back requests so bursts stay under a tokens-per-minute budget"""
+    
+    def __init__(self, tokens_per_minute: int):
+        self.tokens_per_minute = tokens_per_minute
+        self.available = float(tokens_per_minute)
+        self.updated_at = time.monotonic()
+        self._lock = None
+    
+    async def acquire(self, tokens: int):
+        """Wait until the estimated tokens for a request fit in the budget"""
+        if self.tokens_per_minute <= 0:
+            return
+        
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        
+        # A single request larger than the whole budget can only ever wait for a full bucket
+        tokens = min(tokens, self.tokens_per_minute)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                refill = (now - self.updated_at) * self.tokens_per_minute / 60
+                self.available = min(self.tokens_per_minute, self.available + refill)
+                self.updated_at = now
+                
+                if self.available >= tokens:
+                    self.available -= tokens
+                    return
+                await asyncio.sleep((tokens - self.available) * 60 / self.tokens_per_minute)
+
+# 0 disables rate limiting; set to the account/model TPM limit to avoid 429s under load
+rate_limiter = TokenRateLimiter(int(os.getenv('AI_TOKENS_PER_MINUTE', 0)))
+
+def _estimate_tokens(text: str, max_tokens: Optional[int]) -> int:
+    """Preemptive estimate of a request's token cost: prompt at ~4 chars/token plus the output budget"""
+    return len(text) // 4 + (max_tokens or DEFAULT_MAX_TOKENS)
+
+# Experience patterns used by ResumeEvaluationEngine._extract_years
+_RANGE_RE = re.compile(r'(\d+)[\s\-to]+(\d+)\s*(?:years?|yrs?)')  # e.g. "3-5 years", "2 to 4 years"
+_SINGLE_RE = re.compile(r'(\d+)\+?\s*(?:years?|yrs?)')  # e.g. "5 years", "3+ years"
+_ENTRY_RE = re.compile(r'fresh|graduate|entry|junior|new')  # e.g. "fresh graduate", "entry level"
+
+def _single_requirement_score(candidate_years: int, required_years: int) -> int:
+    """Experience score against a single-number requirement (e.g. "5 years")"""
+    if candidate_years < required_years:
+        return max(25, 70 - (required_years - candidate_years) * 8)
+    if candidate_years == required_years:
+        return 90
+    return 80 if candidate_years > required_years + 8 else 95
+
+# Precomputed scores for every (candidate, required) pair in the realistic 0-40 year range
+_EXP_TABLE_MAX_YEARS = 40
+_EXP_SCORE_TABLE = tuple(
+    tuple(_single_requirement_score(candidate, required) for required in range(_EXP_TABLE_MAX_YEARS + 1))
+    for candidate in range(_EXP_TABLE_MAX_YEARS + 1)
+)
+
+# A skill normalized once at ingress: (lowered text, token set)
+NormalizedSkill = tuple[str, frozenset]
 
-logger.info(f"Successfully initialized OpenRouter LLM: {model_name} with reduced token limit")
+def normalize_skills(skills: List[Any]) -> tuple[NormalizedSkill, ...]:
+    """Lowercase and tokenize skills once; already-normalized entries pass through"""
+    normalized = []
+    for skill in skills:
+        if isinstance(skill, tuple):
+            normalized.append(skill)
+        else:
+            lowered = skill.lower()
+            normalized.append((lowered, frozenset(lowered.split())))
+    return tuple(normalized)
+
+@lru_cache(maxsize=4096)
+def _token_similarity(words1: frozenset, words2: frozenset) -> float:
+    """Jaccard similarity of two pre-tokenized skills, memoized across a screening batch"""
+    if not words1 or not words2:
+        return 0.0
+        
+    return len(words1 & words2) / len(words1 | words2)
+
+@lru_cache(maxsize=4096)
+def _calculate_similarity(skill1: str, skill2: str) -> float:
+    """Simple similarity calculation"""
+    return _token_similarity(frozenset(skill1.split()), frozenset(skill2.split()))
 
 class ResumeEvaluationEngine:
     """Advanced Resume Evaluation Engine with industry-standard scoring"""
@@ -164,21 +356,20 @@ class ResumeEvaluationEngine:
                         score = 95
                         reason = f"Excellent experience: {candidate_years} years exceeds requirement appropriately"
             else:
-                # Single number requirement
+                # Single number requirement, table lookup within the precomputed range
+                if candidate_years <= _EXP_TABLE_MAX_YEARS and required_years <= _EXP_TABLE_MAX_YEARS:
+                    score = _EXP_SCORE_TABLE[candidate_years][required_years]
+                else:
+                    score = _single_requirement_score(candidate_years, required_years)
+                
                 if candidate_years < required_years:
-                    score = max(25, 70 - (required_years - candidate_years) * 8)
                     reason = f"Below requirement: {candidate_years} vs {required_years} years needed"
                 elif candidate_years == required_years:
-                    score = 90
                     reason = f"Exact match: {candidate_years} years experience"
+                elif candidate_years > required_years + 8:
+                    reason = f"Significantly overqualified: {candidate_years} vs {required_years} years"
                 else:
-                    # Check for overqualification
-                    if candidate_years > required_years + 8:
-                        score = 80
-                        reason = f"Significantly overqualified: {candidate_years} vs {required_years} years"
-                    else:
-                        score = 95
-                        reason = f"Above requirement: {candidate_years} years exceeds {required_years} years needed"
+                    reason = f"Above requirement: {candidate_years} years exceeds {required_years} years needed"
                         
             return score, reason
             
@@ -194,50 +385,54 @@ class ResumeEvaluationEngine:
         text = text.lower().strip()
         
         # Pattern for range (e.g., "3-5 years", "2 to 4 years")
-        range_pattern = r'(\d+)[\s\-to]+(\d+)\s*(?:years?|yrs?)'
-        range_match = re.search(range_pattern, text)
+        range_match = _RANGE_RE.search(text)
         if range_match:
             return (int(range_match.group(1)), int(range_match.group(2)))
         
         # Pattern for single number (e.g., "5 years", "3+ years")
-        single_pattern = r'(\d+)\+?\s*(?:years?|yrs?)'
-        single_match = re.search(single_pattern, text)
+        single_match = _SINGLE_RE.search(text)
         if single_match:
             return int(single_match.group(1))
         
         # Pattern for "fresh graduate" or "entry level"
-        if any(term in text for term in ['fresh', 'graduate', 'entry', 'junior', 'new']):
+        if _ENTRY_RE.search(text):
             return 0
             
         return None
 
-    def analyze_skill_match(self, candidate_skills: List[str], required_skills: List[str]) -> tuple[int, str]:
-        """Analyze skill matching with weighted scoring"""
+    def analyze_skill_match(self, candidate_skills: List[Any], required_skills: List[Any]) -> tuple[int, str]:
+        """Analyze skill matching with weighted scoring, accepts raw or normalize_skills() input"""
         if not candidate_skills or not required_skills:
             return 40, "Insufficient skill information provided"
         
-        candidate_skills_lower = [skill.lower() for skill in candidate_skills]
-        required_skills_lower = [skill.lower() for skill in required_skills]
+        candidates = normalize_skills(candidate_skills)
+        required = normalize_skills(required_skills)
+        candidate_skills_lower = [skill for skill, _ in candidates]
         
-        # Exact matches
-        exact_matches = []
-        for req_skill in required_skills_lower:
-            for cand_skill in candidate_skills_lower:
-                if req_skill in cand_skill or cand_skill in req_skill:
-                    exact_matches.append(req_skill)
-                    break
+        # Exact matches: required skill contained in a candidate skill (one scan over the
+        # joined candidates) or a candidate skill contained in the required skill
+        candidate_blob = '\x00'.join(candidate_skills_lower)
+        exact_matches = [
+            req_skill for req_skill, _ in required
+            if req_skill in candidate_blob or any(cand_skill in req_skill for cand_skill in candidate_skills_lower)
+        ]
+        exact_match_set = set(exact_matches)
+        
+        # Partial matches (semantic similarity): index candidate tokens so each required
+        # skill is only compared with candidates sharing a word
+        token_index = defaultdict(set)
+        for idx, (_, tokens) in enumerate(candidates):
+            for token in tokens:
+                token_index[token].add(idx)
         
-        # Partial matches (semantic similarity)
         partial_matches = []
-        for req_skill in required_skills_lower:
-            if req_skill not in exact_matches:
-                for cand_skill in candidate_skills_lower:
-                    # Simple semantic matching
-                    if self._calculate_similarity(req_skill, cand_skill) > 0.7:
-                        partial_matches.append(req_skill)
-                        break
+        for req_skill, req_tokens in required:
+            if req_skill not in exact_match_set:
+                overlapping = set().union(*(token_index.get(token, ()) for token in req_tokens))
+                if any(_token_similarity(req_tokens, candidates[idx][1]) > 0.7 for idx in overlapping):
+                    partial_matches.append(req_skill)
         
-        total_required = len(required_skills_lower)
+        total_required = len(required)
         exact_score = len(exact_matches) / total_required * 80
         partial_score = len(partial_matches) / total_required * 40
         
@@ -258,92 +453,115 @@ class ResumeEvaluationEngine:
 
     def _calculate_similarity(self, skill1: str, skill2: str) -> float:
         """Simple similarity calculation"""
-        words1 = set(skill1.split())
-        words2 = set(skill2.split())
-        
-        if not words1 or not words2:
-            return 0.0
-            
-        intersection = words1.intersection(words2)
-        union = words1.union(words2)
-        
-        return len(intersection) / len(union)
+        return _calculate_similarity(skill1, skill2)
+
+# Agents print every reasoning step when verbose, keep it off outside debugging
+VERBOSE_AGENTS = os.getenv("AI_ENGINE_VERBOSE", "0") == "1"
 
 # Enhanced AI Agents with improved prompts
-resume_analyzer = Agent(
-    role="Senior Resume Analyst",
-    goal="Extract comprehensive information from resumes with high accuracy and attention to detail.",
-    backstory=(
-        "You are a senior HR analyst with 15+ years of experience in talent acquisition. "
-        "You excel at extracting and structuring information from resumes, identifying key qualifications, "
-        "and understanding the nuances of different industries and roles. Your analysis is thorough, "
-        "accurate, and provides valuable insights for hiring decisions."
-    ),
-    llm=get_llm_with_fallback(),
-    allow_delegation=False,
-    verbose=True
-)
+@lru_cache(maxsize=1)
+def get_resume_analyzer() -> Agent:
+    """Agent that extracts structured facts from a resume"""
+    from crewai import Agent
+    
+    return Agent(
+        role="Senior Resume Analyst",
+        goal="Extract comprehensive information from resumes with high accuracy and attention to detail.",
+        backstory=(
+            "You are a senior HR analyst with 15+ years of experience in talent acquisition. "
+            "You excel at extracting and structuring information from resumes, identifying key qualifications, "
+            "and understanding the nuances of different industries and roles. Your analysis is thorough, "
+            "accurate, and provides valuable insights for hiring decisions."
+        ),
+        llm=get_llm(TASK_MAX_TOKENS['resume_analysis']),
+        allow_delegation=False,
+        verbose=VERBOSE_AGENTS
+    )
 
-job_description_analyzer = Agent(
-    role="Job Requirements Specialist",
-    goal="Analyze job descriptions to extract precise requirements and evaluation criteria.",
-    backstory=(
-        "You are a job analysis expert who specializes in breaking down job descriptions into "
-        "specific, measurable requirements. You understand the difference between must-have and nice-to-have "
-        "qualifications, and can identify implicit requirements that may not be explicitly stated."
-    ),
-    llm=get_llm_with_fallback(),
-    allow_delegation=False,
-    verbose=True
-)
+@lru_cache(maxsize=1)
+def get_job_description_analyzer() -> Agent:
+    """Agent that structures job description requirements"""
+    from crewai import Agent
+    
+    return Agent(
+        role="Job Requirements Specialist",
+        goal="Analyze job descriptions to extract precise requirements and evaluation criteria.",
+        backstory=(
+            "You are a job analysis expert who specializes in breaking down job descriptions into "
+            "specific, measurable requirements. You understand the difference between must-have and nice-to-have "
+            "qualifications, and can identify implicit requirements that may not be explicitly stated."
+        ),
+        llm=get_llm(TASK_MAX_TOKENS['job_analysis']),
+        allow_delegation=False,
+        verbose=VERBOSE_AGENTS
+    )
 
-advanced_evaluator = Agent(
-    role="Senior Talent Evaluation Specialist",
-    goal="Provide comprehensive, fair, and industry-standard resume evaluations with detailed scoring.",
-    backstory=(
-        "You are a senior talent evaluation specialist with expertise in multiple industries. "
-        "You use data-driven approaches to assess candidates fairly and consistently. Your evaluations "
-        "are trusted by Fortune 500 companies for their accuracy and insight. You consider not just "
-        "technical qualifications but also career progression, achievements, and potential cultural fit."
-    ),
-    llm=get_llm_with_fallback(),
-    allow_delegation=False,
-    verbose=True
-)
+@lru_cache(maxsize=1)
+def get_advanced_evaluator() -> Agent:
+    """Agent that scores a candidate against the job requirements"""
+    from crewai import Agent
+    
+    return Agent(
+        role="Senior Talent Evaluation Specialist",
+        goal="Provide comprehensive, fair, and industry-standard resume evaluations with detailed scoring.",
+        backstory=(
+            "You are a senior talent evaluation specialist with expertise in multiple industries. "
+            "You use data-driven approaches to assess candidates fairly and consistently. Your evaluations "
+            "are trusted by Fortune 500 companies for their accuracy and insight. You consider not just "
+            "technical qualifications but also career progression, achievements, and potential cultural fit."
+        ),
+        llm=get_llm(TASK_MAX_TOKENS['evaluation']),
+        allow_delegation=False,
+        verbose=VERBOSE_AGENTS
+    )
 
-interview_strategist = Agent(
-    role="Interview Strategy Expert",
-    goal="Design targeted interview questions that effectively assess candidate suitability.",
-    backstory=(
-        "You are an interview design expert who creates questions that reveal true candidate capabilities. "
-        "Your questions are behavioral, situational, and technical, designed to predict job performance. "
-        "You understand how to assess both hard and soft skills through strategic questioning."
-    ),
-    llm=get_llm_with_fallback(),
-    allow_delegation=False,
-    verbose=True
-)
+@lru_cache(maxsize=1)
+def get_interview_strategist() -> Agent:
+    """Agent that designs the interview plan"""
+    from crewai import Agent
+    
+    return Agent(
+        role="Interview Strategy Expert",
+        goal="Design targeted interview questions that effectively assess candidate suitability.",
+        backstory=(
+            "You are an interview design expert who creates questions that reveal true candidate capabilities. "
+            "Your questions are behavioral, situational, and technical, designed to predict job performance. "
+            "You understand how to assess both hard and soft skills through strategic questioning."
+        ),
+        llm=get_llm(TASK_MAX_TOKENS['interview_design']),
+        allow_delegation=False,
+        verbose=VERBOSE_AGENTS
+    )
 
-quality_assurance_agent = Agent(
-    role="Quality Assurance Specialist",
-    goal="Ensure evaluation consistency, accuracy, and compliance with best practices.",
-    backstory=(
-        "You are a quality assurance specialist who ensures all evaluations meet high standards. "
-        "You check for bias, consistency, and completeness in assessments. Your role is critical "
-        "in maintaining the integrity and reliability of the evaluation process."
-    ),
-    llm=get_llm_with_fallback(),
-    allow_delegation=False,
-    verbose=True
-)
+@lru_cache(maxsize=1)
+def get_quality_assurance_agent() -> Agent:
+    """Agent that QA's and finalizes the evaluation JSON"""
+    from crewai import Agent
+    
+    return Agent(
+        role="Quality Assurance Specialist",
+        goal="Ensure evaluation consistency, accuracy, and compliance with best practices.",
+        backstory=(
+            "You are a quality assurance specialist who ensures all evaluations meet high standards. "
+            "You check for bias, consistency, and completeness in assessments. Your role is critical "
+            "in maintaining the integrity and reliability of the evaluation process."
+        ),
+        llm=get_llm(TASK_MAX_TOKENS['quality_review']),
+        allow_delegation=False,
+        verbose=VERBOSE_AGENTS
+    )
+
+def _compact_prompt(prompt: str) -> str:
+    """Strip indentation, runs of spaces and blank lines from a prompt to save input tokens"""
+    lines = (re.sub(r'[ \t]+', ' ', line).strip() for line in textwrap.dedent(prompt).splitlines())
+    return '\n'.join(line for line in lines if line)
 
 # Enhanced Tasks
-resume_analysis_task = Task(
-    description="""
+RESUME_ANALYSIS_PROMPT: Final[Template] = Template(_compact_prompt("""
 You are extracting **facts only** from a resume. Do not infer, expand, or invent. If a field is not present, return the closest faithful value or null per schema.
 
 INPUT RESUME (raw text):
-{resume}
+$resume
 
 OUTPUT FORMAT — return **only** valid JSON matching this exact schema (no extra fields, no markdown):
 
@@ -380,31 +598,38 @@ QUALITY CHECKS (perform internally before returning JSON):
 - years_experience is an integer (approximate conservatively if necessary).
 
 Return **JSON only**. No prose, no markdown, no comments.
-""",
-    expected_output="Strict, faithful JSON that matches the schema exactly. No invented data. Name is real or 'Unknown'.",
-    agent=resume_analyzer
-)
+"""))
+
+@lru_cache(maxsize=1)
+def get_resume_analysis_task() -> Task:
+    """Resume fact extraction task"""
+    from crewai import Task
+    
+    return Task(
+        description=RESUME_ANALYSIS_PROMPT.safe_substitute(resume='{resume}'),
+        expected_output="Strict, faithful JSON that matches the schema exactly. No invented data. Name is real or 'Unknown'.",
+        agent=get_resume_analyzer()
+    )
 
-job_analysis_task = Task(
-    description="""
+JOB_ANALYSIS_PROMPT: Final[Template] = Template(_compact_prompt("""
 You analyze a job description and structure requirements with rigor. Do not add anything not stated or clearly implied by the JD. If the JD is silent, leave fields empty or concise "N/A".
 
 RAW JOB DESCRIPTION:
-{job_description}
+$job_description
 
-OUTPUT — **JSON only**, following exactly:
+OUTPUT — **JSON only**, following exactly (a "?" type means use "unspecified" when the JD is silent):
 
 {
   "Role Information": {
     "Job Title": "string",
-    "Level": "entry|mid|senior|executive|unspecified",
-    "Department": "string|unspecified",
-    "Reporting Structure": "string|unspecified",
-    "Employment Type": "full-time|part-time|contract|internship|unspecified",
+    "Level": "entry|mid|senior|executive?",
+    "Department": "string?",
+    "Reporting Structure": "string?",
+    "Employment Type": "full-time|part-time|contract|internship?",
     "Locations": [ "string" ]
   },
   "Experience Requirements": {
-    "Years of Experience": { "Minimum": "string|number|unspecified", "Preferred": "string|number|unspecified" },
+    "Years of Experience": { "Minimum": "string|number?", "Preferred": "string|number?" },
     "Specific Industry Experience": [ "string" ],
     "Previous Role Requirements": [ "string" ]
   },
@@ -422,11 +647,11 @@ OUTPUT — **JSON only**, following exactly:
   "Key Responsibilities": {
     "Primary Duties and Accountabilities": [ "string" ],
     "Success Metrics and KPIs": [ "string" ],
-    "Team Size or Budget Responsibility": "string|unspecified"
+    "Team Size or Budget Responsibility": "string?"
   },
   "Company and Culture": {
-    "Company Size": "string|unspecified",
-    "Industry": "string|unspecified",
+    "Company Size": "string?",
+    "Industry": "string?",
     "Work Environment and Culture": [ "string" ],
     "Growth Opportunities": [ "string" ]
   },
@@ -448,13 +673,20 @@ HARD RULES:
 - Preserve precise constraints (e.g., "US work authorization required", "no sponsorship").
 
 Return **JSON only**.
-""",
-    expected_output="A faithful, prioritized JSON breakdown of the JD with Critical/Important/Preferred clarity.",
-    agent=job_description_analyzer
-)
+"""))
+
+@lru_cache(maxsize=1)
+def get_job_analysis_task() -> Task:
+    """Job description analysis task"""
+    from crewai import Task
+    
+    return Task(
+        description=JOB_ANALYSIS_PROMPT.safe_substitute(job_description='{job_description}'),
+        expected_output="A faithful, prioritized JSON breakdown of the JD with Critical/Important/Preferred clarity.",
+        agent=get_job_description_analyzer()
+    )
 
-comprehensive_evaluation_task = Task(
-    description=f"""
+EVALUATION_PROMPT: Final[str] = _compact_prompt("""
 You compute a hiring fit using only the structured outputs from the resume and job analysis. Be conservative and fair. Do not penalize protected attributes or add unstated requirements.
 
 INPUTS:
@@ -463,21 +695,21 @@ INPUTS:
 
 OUTPUT — **JSON only** with this exact shape:
 
-{{
+{
   "candidate_name": "ACTUAL_NAME_FROM_RESUME",
   "overall_score": 0-100,
   "qualification_tag": "QUALIFIED | NOT QUALIFIED | OVERQUALIFIED",
-  "category_scores": {{
+  "category_scores": {
       "experience": int,
       "skills": int,
       "education": int,
       "achievements": int,
       "culture": int
-  }},
+  },
   "strengths": [ "string" ],
   "areas_of_concern": [ "string" ],
   "recommendations": "string",
-  "interview_questions": {{
+  "interview_questions": {
       "technical_questions": [ "string" ],
       "behavioral_questions": [ "string" ],
       "situational_questions": [ "string" ],
@@ -486,8 +718,8 @@ OUTPUT — **JSON only** with this exact shape:
       "interview_duration": "string",
       "panel_composition": "string",
       "evaluation_criteria": "string"
-  }}
-}}
+  }
+}
 
 SCORING & RULES (apply consistently):
 - **Use only** facts from the structured resume/JD outputs. No outside knowledge or guessing.
@@ -512,14 +744,21 @@ INTERVIEW CONTENT:
 - Provide concise, neutral language.
 
 Return **JSON only**. No markdown or prose.
-""",
-    expected_output="Validated, bias-aware evaluation JSON with consistent category scores and actionable interview questions.",
-    context=[resume_analysis_task, job_analysis_task],
-    agent=advanced_evaluator,
-)
+""")
+
+@lru_cache(maxsize=1)
+def get_comprehensive_evaluation_task() -> Task:
+    """Candidate evaluation task, depends on both analyses"""
+    from crewai import Task
+    
+    return Task(
+        description=EVALUATION_PROMPT,
+        expected_output="Validated, bias-aware evaluation JSON with consistent category scores and actionable interview questions.",
+        context=[get_resume_analysis_task(), get_job_analysis_task()],
+        agent=get_advanced_evaluator()
+    )
 
-interview_design_task = Task(
-    description="""
+INTERVIEW_DESIGN_PROMPT: Final[str] = _compact_prompt("""
 Design a targeted interview plan derived from the evaluation results. Do not restate the resume; build questions that validate skills, experience scope, and risk areas. No trivia.
 
 INPUT:
@@ -544,14 +783,21 @@ HARD RULES:
 - No generic "tell me about yourself".
 - Prefer scenario/system/tradeoff questions with clear success signals.
 - No prose outside JSON.
-""",
-    expected_output="A JSON-only interview plan with focused, role-relevant questions and an explicit rubric.",
-    agent=interview_strategist,
-    context=[comprehensive_evaluation_task]
-)
+""")
 
-quality_review_task = Task(
-    description="""
+@lru_cache(maxsize=1)
+def get_interview_design_task() -> Task:
+    """Interview design task, depends on the evaluation"""
+    from crewai import Task
+    
+    return Task(
+        description=INTERVIEW_DESIGN_PROMPT,
+        expected_output="A JSON-only interview plan with focused, role-relevant questions and an explicit rubric.",
+        agent=get_interview_strategist(),
+        context=[get_comprehensive_evaluation_task()]
+    )
+
+QUALITY_REVIEW_PROMPT: Final[str] = _compact_prompt("""
 Perform a final QA across all prior outputs. Ensure the candidate's actual name is used consistently (no placeholders). Validate schema, scores, tags, and bias compliance. If something is missing or non-compliant, fix it **within** the final JSON only — do not write commentary.
 
 INPUTS:
@@ -593,38 +839,51 @@ MANDATORY CHECKS (fix quietly inside the JSON if needed):
 - **Interview content**: questions are role-specific and probe risks/requirements.
 
 Return **JSON only**. No prose, no markdown.
-""",
-    expected_output="A fully QA'd, schema-accurate, bias-safe evaluation JSON ready for storage and display.",
-    agent=quality_assurance_agent,
-    context=[resume_analysis_task, job_analysis_task, comprehensive_evaluation_task, interview_design_task]
-)
+""")
+
+@lru_cache(maxsize=1)
+def get_quality_review_task() -> Task:
+    """Final QA task over all prior outputs"""
+    from crewai import Task
+    
+    return Task(
+        description=QUALITY_REVIEW_PROMPT,
+        expected_output="A fully QA'd, schema-accurate, bias-safe evaluation JSON ready for storage and display.",
+        agent=get_quality_assurance_agent(),
+        context=[get_resume_analysis_task(), get_job_analysis_task(), get_comprehensive_evaluation_task(), get_interview_design_task()]
+    )
+
+def _extract_pdf(fname: str) -> str:
+    """Extract text from a PDF, one line"""
+    doc = fitz.open(fname)
+    text = "".join([page.get_text() for page in doc])
+    doc.close()
+    return text.replace('\n', ' ')
+
+def _extract_txt(fname: str) -> str:
+    """Read a UTF-8 text file, replacing undecodable bytes"""
+    return Path(fname).read_text(encoding='utf-8', errors='replace')
+
+def _extract_docx(fname: str) -> str:
+    """Extract paragraph text from a Word document"""
+    doc = Document(fname)
+    return ' '.join([para.text for para in doc.paragraphs])
+
+_EXTRACTORS = {
+    '.pdf': _extract_pdf,
+    '.txt': _extract_txt,
+    '.docx': _extract_docx,
+}
 
 def extract_text(fname: str) -> str:
     """Enhanced text extraction with better error handling"""
     try:
-        file_extension = fname.split('.')[-1].lower()
-        
-        if file_extension == 'pdf':
-            doc = fitz.open(fname)
-            text = ""
-            for page in doc:
-                text += str(page.get_text())
-            doc.close()
-            return " ".join(text.split('\n'))
-            
-        elif file_extension == 'txt':
-            with open(fname, 'r', encoding='utf-8') as file:
-                return file.read()
-                
-        elif file_extension == 'docx':
-            doc = Document(fname)
-            text = []
-            for para in doc.paragraphs:
-                text.append(para.text)
-            return ' '.join(text)
-            
-        else:
-            raise ValueError(f"Unsupported file format: {file_extension}")
+        file_extension = Path(fname).suffix.lower()
+        try:
+            extractor = _EXTRACTORS[file_extension]
+        except KeyError:
+            raise ValueError(f"Unsupported file format: {file_extension}") from None
+        return extractor(fname)
             
     except Exception as e:
         logger.error(f"Error extracting text from {fname}: {e}")
@@ -632,6 +891,8 @@ def extract_text(fname: str) -> str:
 
 # Old parsing functions removed - using clean JSON output from tasks
 
+_VALID_TAGS = frozenset({'QUALIFIED', 'NOT QUALIFIED', 'OVERQUALIFIED'})
+
 def validate_agent_data_flow(resume_data: dict, job_data: dict, evaluation_data: dict) -> dict:
     """
     Validate data consistency across agent outputs
@@ -680,16 +941,17 @@ def validate_agent_data_flow(resume_data: dict, job_data: dict, evaluation_data:
         validation_results['cross_validation'] = {
             'name_consistency': name_consistency,
             'score_range': 0 <= evaluation_data.get('overall_score', 0) <= 100,
-            'tag_validity': evaluation_data.get('qualification_tag') in ['QUALIFIED', 'NOT QUALIFIED', 'OVERQUALIFIED']
+            'tag_validity': evaluation_data.get('qualification_tag') in _VALID_TAGS
         }
     
-    # Overall status
-    all_validations = []
-    for section in validation_results.values():
-        if isinstance(section, dict):
-            all_validations.extend(section.values())
+    # Overall status, short-circuits on the first failed check
+    is_pass = all(
+        check
+        for section in validation_results.values() if isinstance(section, dict)
+        for check in section.values()
+    )
     
-    if not all(all_validations):
+    if not is_pass:
         validation_results['overall_status'] = 'FAIL'
         logger.warning("Data flow validation failed")
     else:
@@ -697,33 +959,410 @@ def validate_agent_data_flow(resume_data: dict, job_data: dict, evaluation_data:
     
     return validation_results
 
-# Create the enhanced crew
-enhanced_crew = Crew(
-    agents=[
-        resume_analyzer,
-        job_description_analyzer,
-        advanced_evaluator,
-        interview_strategist,
-        quality_assurance_agent
-    ],
-    tasks=[
-        resume_analysis_task,
-        job_analysis_task,
-        comprehensive_evaluation_task,
-        interview_design_task,
-        quality_review_task
-    ],
-    verbose=True,
-    process=Process.sequential
+class ResponseCache:
+    """SQLite-backed cache of agent outputs keyed by the inputs that produced them"""
+    
+    def __init__(self, path: str, ttl_seconds: int, enabled: bool = True):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._conn = None
+        self._lock = threading.Lock()
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Open the cache database on first use"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+        return self._conn
+    
+    def get(self, key: str) -> Optional[str]:
+        """Get a cached output, or None if missing or expired"""
+        if not self.enabled:
+            return None
+        try:
+            with self._lock:
+                row = self._connection().execute(
+                    "SELECT value FROM responses WHERE key = ? AND created_at > ?",
+                    (key, time.time() - self.ttl_seconds)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache read failed: {e}")
+            return None
+        return row[0] if row else None
+    
+    def set(self, key: str, value: str):
+        """Store an output"""
+        if not self.enabled:
+            return
+        try:
+            with self._lock, self._connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, value, time.time())
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache write failed: {e}")
+
+response_cache = ResponseCache(
+    os.path.join(os.getenv('AI_CACHE_DIR', os.path.join('.cache', 'llm')), 'responses.sqlite3'),
+    ttl_seconds=int(os.getenv('AI_CACHE_TTL_SECONDS', 7 * 24 * 3600)),
+    enabled=os.getenv('AI_RESPONSE_CACHE', '1') == '1'
 )
 
-# Backwards compatibility exports
-crew = enhanced_crew
-summarization_task = resume_analysis_task
-evaluation_task = comprehensive_evaluation_task
-interview_task = interview_design_task
-editor_task = quality_review_task
-output_parser_task = quality_review_task
+def _digest(text: str) -> str:
+    """Short stable hash of an input text"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+def _cache_key(task_name: str, task: Task, resume_hash: str = '', jd_hash: str = '') -> str:
+    """Cache key for a task output; the prompt version changes whenever the prompt does"""
+    prompt_version = _digest(task.description + task.expected_output)
+    return ':'.join((model_name, str(temperature), task_name, prompt_version, resume_hash, jd_hash))
+
+def _render_task_prompt(task: Task, inputs: Dict[str, str], context: Dict[str, str]) -> str:
+    """Fill a task's input placeholders and append the outputs it depends on"""
+    prompt = task.description
+    for key, value in inputs.items():
+        prompt = prompt.replace('{' + key + '}', value)
+    
+    if context:
+        context_block = "\n\n".join(f"{name}.output:\n{output}" for name, output in context.items())
+        prompt = f"{prompt}\n\nCONTEXT FROM PREVIOUS TASKS:\n\n{context_block}"
+    
+    return f"{prompt}\n\nEXPECTED OUTPUT: {task.expected_output}"
+
+@retry(retry=retry_if_exception_type(TransientLLMError), wait=wait_exponential_jitter(initial=1, max=30),
+       stop=stop_after_attempt(LLM_MAX_ATTEMPTS), reraise=True)
+async def _ainvoke(agent: Agent, prompt: str, max_tokens: Optional[int] = None) -> str:
+    """Send a prompt to the LLM using the agent's persona as the system message, retrying transient errors on the next key"""
+    from langchain_core.messages import HumanMessage, SystemMessage
+    
+    messages = [
+        SystemMessage(content=f"You are a {agent.role}. {agent.goal}\n\n{agent.backstory}"),
+        HumanMessage(content=prompt)
+    ]
+    global _global_semaphore
+    key_manager = get_key_manager()
+    if _global_semaphore is None:
+        _global_semaphore = asyncio.Semaphore(MAX_CONCURRENT_PER_KEY * len(key_manager.keys))
+    
+    async with _global_semaphore:
+        await rate_limiter.acquire(_estimate_tokens(messages[0].content + prompt, max_tokens))
+        
+        # Spread calls across keys round-robin, each key with its own concurrency limit
+        key_index = key_manager.get_next_index()
+        semaphore = _key_semaphores.get(key_index)
+        if semaphore is None:
+            semaphore = _key_semaphores[key_index] = asyncio.Semaphore(MAX_CONCURRENT_PER_KEY)
+        llm = get_llm_for_key(key_index)
+        model = llm.bind(max_tokens=max_tokens) if max_tokens else llm
+        async with semaphore:
+            try:
+                response = await model.ainvoke(messages)
+            except Exception as e:
+                if getattr(e, 'status_code', None) in _KEY_FAILURE_STATUSES:
+                    key_manager.mark_key_failed(key_manager.keys[key_index], _retry_after_seconds(getattr(e, 'response', None)))
+                if _is_transient_error(e):
+                    raise TransientLLMError(f"Key {key_index + 1}: {e}") from e
+                raise
+        key_manager.mark_key_succeeded(key_index)
+    return response.content
+
+def _compact_output(raw: str) -> str:
+    """Re-serialize a JSON task output compactly, leaving non-JSON output untouched"""
+    try:
+        return orjson.dumps(orjson.loads(raw)).decode()
+    except orjson.JSONDecodeError:
+        return raw
+
+# Task calls currently running, by cache key (only touched from the pipeline loop)
+_inflight: Dict[str, asyncio.Future] = {}
+
+async def _ainvoke_task(task: Task, inputs: Dict[str, str], context: Optional[Dict[str, str]] = None,
+                        cache_key: Optional[str] = None, refresh: bool = False,
+                        max_tokens: Optional[int] = None) -> str:
+    """Run a single task against its agent's persona with one async LLM call, using the response cache"""
+    prompt = _render_task_prompt(task, inputs, context or {})
+    if not cache_key:
+        return _compact_output(await _ainvoke(task.agent, prompt, max_tokens))
+    
+    # Identical concurrent requests share the call already in flight
+    pending = _inflight.get(cache_key)
+    if pending is not None:
+        return await asyncio.shield(pending)
+    
+    if not refresh:
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+    
+    future = asyncio.get_running_loop().create_future()
+    _inflight[cache_key] = future
+    try:
+        output = _compact_output(await _ainvoke(task.agent, prompt, max_tokens))
+        response_cache.set(cache_key, output)
+        future.set_result(output)
+        return output
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # retrieved here, waiters re-raise it themselves
+        raise
+    finally:
+        del _inflight[cache_key]
+
+async def run_pipeline(resume_text: str, job_description: str, refresh: bool = False) -> str:
+    """
+    Run the evaluation pipeline, fanning out stages that don't depend on each other.
+    Returns the raw output of the final quality review task. refresh=True ignores cached outputs.
+    """
+    inputs = {"resume": resume_text, "job_description": job_description}
+    resume_hash, jd_hash = _digest(resume_text), _digest(job_description)
+    
+    # Stage 1: resume and job analysis are independent, run them concurrently
+    resume_output, job_output = await asyncio.gather(
+        _ainvoke_task(get_resume_analysis_task(), inputs,
+                      cache_key=_cache_key('resume_analysis', get_resume_analysis_task(), resume_hash=resume_hash),
+                      refresh=refresh, max_tokens=TASK_MAX_TOKENS['resume_analysis']),
+        _ainvoke_task(get_job_analysis_task(), inputs,
+                      cache_key=_cache_key('job_analysis', get_job_analysis_task(), jd_hash=jd_hash),
+                      refresh=refresh, max_tokens=TASK_MAX_TOKENS['job_analysis'])
+    )
+    
+    # Stage 2: evaluation needs both analyses
+    evaluation_output = await _ainvoke_task(get_comprehensive_evaluation_task(), inputs, {
+        'resume_analysis_task': resume_output,
+        'job_analysis_task': job_output
+    }, cache_key=_cache_key('evaluation', get_comprehensive_evaluation_task(), resume_hash, jd_hash), refresh=refresh,
+        max_tokens=TASK_MAX_TOKENS['evaluation'])
+    
+    # Stages 3-4: interview design, then quality review of everything
+    return await _review_candidate(resume_output, job_output, evaluation_output, resume_hash, jd_hash, refresh)
+
+# Batch prompting: several resumes share one LLM call, separated by a sentinel line
+BATCH_SIZE = int(os.getenv('AI_BATCH_SIZE', 5))
+RESUME_SEPARATOR = "\n---RESUME|||SEP|||BOUNDARY---\n"
+BATCH_INSTRUCTIONS = """
+BATCH MODE: The input contains {count} resumes separated by the line "---RESUME|||SEP|||BOUNDARY---".
+Each resume starts with a "RESUME_INDEX: <n>" line, numbered from 0.
+Apply every instruction above to each resume independently; never mix facts between resumes.
+Return **JSON only** as {{"results": [ ... ]}} with exactly {count} objects, one per resume.
+Every object must include "resume_index" set to the RESUME_INDEX of the resume it describes.
+"""
+
+def _join_batch(items: List[str]) -> str:
+    """Join batch items with the separator, each prefixed with the index its result must echo back"""
+    return RESUME_SEPARATOR.join(f"RESUME_INDEX: {index}\n{item}" for index, item in enumerate(items))
+
+def _split_batch_output(raw: str, count: int) -> List[str]:
+    """Split a batched response into one JSON string per item by resume_index, or raise ValueError"""
+    try:
+        items = orjson.loads(raw)["results"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Unparseable batch output: {e}") from e
+    
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        raise ValueError(f"Expected {count} results in batch output")
+    
+    # Match results to inputs by the echoed index, never by position, so reordered or merged records are caught
+    by_index = {item.pop('resume_index', None): item for item in items}
+    if len(items) != count or set(by_index) != set(range(count)):
+        raise ValueError(f"Batch output indexes {sorted(map(repr, by_index))} do not match 0..{count - 1}")
+    
+    return [orjson.dumps(by_index[index]).decode() for index in range(count)]
+
+async def _analyze_resume_chunk(resumes: List[str]) -> List[str]:
+    """Analyze a chunk of resumes in one call, falling back to one call per resume"""
+    if len(resumes) > 1:
+        prompt = _render_task_prompt(get_resume_analysis_task(), {"resume": _join_batch(resumes)}, {})
+        prompt += BATCH_INSTRUCTIONS.format(count=len(resumes))
+        try:
+            raw = await _ainvoke(get_resume_analyzer(), prompt, max_tokens=TASK_MAX_TOKENS['resume_analysis'] * len(resumes))
+            return _split_batch_output(raw, len(resumes))
+        except ValueError as e:
+            logger.warning(f"Batched resume analysis failed ({e}), falling back to per-resume calls")
+    
+    return list(await asyncio.gather(*(
+        _ainvoke_task(get_resume_analysis_task(), {"resume": resume}, max_tokens=TASK_MAX_TOKENS['resume_analysis'])
+        for resume in resumes
+    )))
+
+async def _evaluate_chunk(resume_outputs: List[str], job_output: str) -> List[str]:
+    """Evaluate a chunk of analyzed resumes against the shared job analysis in one call"""
+    if len(resume_outputs) > 1:
+        prompt = _render_task_prompt(get_comprehensive_evaluation_task(), {}, {
+            'resume_analysis_task': _join_batch(resume_outputs),
+            'job_analysis_task': job_output
+        })
+        prompt += BATCH_INSTRUCTIONS.format(count=len(resume_outputs))
+        try:
+            raw = await _ainvoke(get_advanced_evaluator(), prompt, max_tokens=TASK_MAX_TOKENS['evaluation'] * len(resume_outputs))
+            return _split_batch_output(raw, len(resume_outputs))
+        except ValueError as e:
+            logger.warning(f"Batched evaluation failed ({e}), falling back to per-resume calls")
+    
+    return list(await asyncio.gather(*(
+        _ainvoke_task(get_comprehensive_evaluation_task(), {}, {
+            'resume_analysis_task': resume_output,
+            'job_analysis_task': job_output
+        }, max_tokens=TASK_MAX_TOKENS['evaluation']) for resume_output in resume_outputs
+    )))
+
+async def _batched_with_cache(keys: List[str], items: List[str], batch_size: int, refresh: bool, run_chunk) -> List[str]:
+    """Serve cached outputs and send only the misses through run_chunk, batch_size items at a time"""
+    outputs = [None if refresh else response_cache.get(key) for key in keys]
+    missing = [i for i, output in enumerate(outputs) if output is None]
+    chunks = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+    
+    results = await asyncio.gather(*(run_chunk([items[i] for i in chunk]) for chunk in chunks))
+    for chunk, chunk_outputs in zip(chunks, results):
+        for i, output in zip(chunk, chunk_outputs):
+            outputs[i] = output
+            response_cache.set(keys[i], output)
+    return outputs
+
+async def analyze_resumes_batch(resumes: List[str], batch_size: int = BATCH_SIZE, refresh: bool = False) -> List[str]:
+    """Run resume analysis over many resumes with batch_size resumes per LLM call"""
+    keys = [_cache_key('resume_analysis', get_resume_analysis_task(), resume_hash=_digest(resume)) for resume in resumes]
+    return await _batched_with_cache(keys, resumes, batch_size, refresh, _analyze_resume_chunk)
+
+async def _review_candidate(resume_output: str, job_output: str, evaluation_output: str,
+                            resume_hash: str, jd_hash: str, refresh: bool = False) -> str:
+    """Interview design and quality review for one evaluated candidate"""
+    interview_output = await _ainvoke_task(get_interview_design_task(), {}, {
+        'comprehensive_evaluation_task': evaluation_output
+    }, cache_key=_cache_key('interview_design', get_interview_design_task(), resume_hash, jd_hash), refresh=refresh,
+        max_tokens=TASK_MAX_TOKENS['interview_design'])
+    
+    return await _ainvoke_task(get_quality_review_task(), {}, {
+        'resume_analysis_task': resume_output,
+        'job_analysis_task': job_output,
+        'comprehensive_evaluation_task': evaluation_output,
+        'interview_design_task': interview_output
+    }, cache_key=_cache_key('quality_review', get_quality_review_task(), resume_hash, jd_hash), refresh=refresh,
+        max_tokens=TASK_MAX_TOKENS['quality_review'])
+
+async def run_batch_pipeline(resume_texts: List[str], job_description: str,
+                             batch_size: int = BATCH_SIZE, refresh: bool = False) -> List[Any]:
+    """
+    Evaluate many resumes against one job description.
+    The job is analyzed once and resume analysis/evaluation are batched; interview design
+    and quality review run per candidate. Returns one raw output or exception per resume.
+    """
+    if not resume_texts:
+        return []
+    
+    jd_hash = _digest(job_description)
+    resume_hashes = [_digest(resume_text) for resume_text in resume_texts]
+    
+    try:
+        job_output, resume_outputs = await asyncio.gather(
+            _ainvoke_task(get_job_analysis_task(), {"job_description": job_description},
+                          cache_key=_cache_key('job_analysis', get_job_analysis_task(), jd_hash=jd_hash), refresh=refresh,
+                          max_tokens=TASK_MAX_TOKENS['job_analysis']),
+            analyze_resumes_batch(resume_texts, batch_size, refresh)
+        )
+        evaluation_outputs = await _batched_with_cache(
+            [_cache_key('evaluation', get_comprehensive_evaluation_task(), resume_hash, jd_hash) for resume_hash in resume_hashes],
+            resume_outputs, batch_size, refresh,
+            lambda chunk: _evaluate_chunk(chunk, job_output)
+        )
+    except Exception as e:
+        logger.error(f"Batch pipeline failed: {e}")
+        return [e] * len(resume_texts)
+    
+    return list(await asyncio.gather(*(
+        _review_candidate(resume_output, job_output, evaluation_output, resume_hash, jd_hash, refresh)
+        for resume_output, evaluation_output, resume_hash in zip(resume_outputs, evaluation_outputs, resume_hashes)
+    ), return_exceptions=True))
+
+# Dedicated event loop so sync callers (Flask workers) can share the async LLM client
+_pipeline_loop = None
+_pipeline_loop_lock = threading.Lock()
+
+def _get_pipeline_loop() -> asyncio.AbstractEventLoop:
+    """Get the background event loop, starting it on first use"""
+    global _pipeline_loop
+    with _pipeline_loop_lock:
+        if _pipeline_loop is None:
+            _pipeline_loop = asyncio.new_event_loop()
+            threading.Thread(target=_pipeline_loop.run_forever, name="ai-engine-loop", daemon=True).start()
+    return _pipeline_loop
+
+def evaluate_resume(resume_text: str, job_description: str, refresh: bool = False) -> str:
+    """Synchronous entry point for run_pipeline, returns the final raw JSON output"""
+    future = asyncio.run_coroutine_threadsafe(
+        run_pipeline(resume_text, job_description, refresh), _get_pipeline_loop()
+    )
+    return future.result()
+
+def evaluate_resumes(resume_texts: List[str], job_description: str, batch_size: int = BATCH_SIZE,
+                     refresh: bool = False) -> List[Any]:
+    """Synchronous entry point for run_batch_pipeline, one raw output or exception per resume"""
+    future = asyncio.run_coroutine_threadsafe(
+        run_batch_pipeline(resume_texts, job_description, batch_size, refresh), _get_pipeline_loop()
+    )
+    return future.result()
+
+# Create the enhanced crew (sequential CrewAI orchestration, the request path uses run_pipeline)
+@lru_cache(maxsize=1)
+def get_enhanced_crew() -> Crew:
+    """Crew running all five tasks sequentially, created on first use"""
+    from crewai import Crew, Process
+    
+    return Crew(
+        agents=(
+            get_resume_analyzer(),
+            get_job_description_analyzer(),
+            get_advanced_evaluator(),
+            get_interview_strategist(),
+            get_quality_assurance_agent()
+        ),
+        tasks=(
+            get_resume_analysis_task(),
+            get_job_analysis_task(),
+            get_comprehensive_evaluation_task(),
+            get_interview_design_task(),
+            get_quality_review_task()
+        ),
+        verbose=Config.LOG_LEVEL == 'DEBUG',
+        process=Process.sequential
+    )
+
+# Lazily built module attributes, including the backwards compatibility exports
+_LAZY_ATTRIBUTES = {
+    'key_manager': get_key_manager,
+    'llm': get_llm,
+    'resume_analyzer': get_resume_analyzer,
+    'job_description_analyzer': get_job_description_analyzer,
+    'advanced_evaluator': get_advanced_evaluator,
+    'interview_strategist': get_interview_strategist,
+    'quality_assurance_agent': get_quality_assurance_agent,
+    'resume_analysis_task': get_resume_analysis_task,
+    'job_analysis_task': get_job_analysis_task,
+    'comprehensive_evaluation_task': get_comprehensive_evaluation_task,
+    'interview_design_task': get_interview_design_task,
+    'quality_review_task': get_quality_review_task,
+    'enhanced_crew': get_enhanced_crew,
+    'crew': get_enhanced_crew,
+    'summarization_task': get_resume_analysis_task,
+    'evaluation_task': get_comprehensive_evaluation_task,
+    'interview_task': get_interview_design_task,
+    'editor_task': get_quality_review_task,
+    'output_parser_task': get_quality_review_task,
+}
+
+def __getattr__(name: str) -> Any:
+    """Build agents, tasks and the crew on first access instead of at import"""
+    factory = _LAZY_ATTRIBUTES.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return factory()
 
 if __name__ == "__main__":
     # Test the system
@@ -1,13 +1,62 @@
 #!/usr/bin/env python3
 """
 Script to clean up the repository by removing unused files
+
+Usage: cleanup_repository.py [--dry-run] [repo | db | all]
 """
 
 import os
 import shutil
+import argparse
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+# Directory listings shared by every cleanup phase in one run, invalidated when a directory changes
+_scan_cache: Dict[str, List[os.DirEntry]] = {}
+
+def _scan(path):
+    """List a directory once per run; DirEntry keeps the name and type from that listing"""
+    if path not in _scan_cache:
+        with os.scandir(path) as entries:
+            _scan_cache[path] = list(entries)
+    return _scan_cache[path]
+
+def _exists(file_path):
+    """Check a path against its parent directory's cached listing"""
+    parent, name = os.path.split(file_path)
+    try:
+        return any(entry.name == name for entry in _scan(parent or '.'))
+    except FileNotFoundError:
+        return False
 
-def cleanup_repository():
+def _purge_dir(path, dry_run=False):
+    """Remove everything inside a directory but keep the directory itself"""
+    # scandir's DirEntry caches the type from the directory listing, so no extra stat per entry
+    for entry in _scan(path):
+        if dry_run:
+            continue
+        if entry.is_dir(follow_symlinks=False):
+            shutil.rmtree(entry.path)
+        else:
+            os.unlink(entry.path)
+    if not dry_run:
+        _scan_cache.pop(path, None)
+
+def _clean_dir(dir_path, dry_run=False):
+    """Purge one directory, returning the status line to print"""
+    try:
+        # Remove all contents but keep the directory
+        _purge_dir(dir_path, dry_run)
+        if dry_run:
+            return f"   🔍 Would clean: {dir_path}/ ({len(_scan(dir_path))} entries)"
+        return f"   ✅ Cleaned: {dir_path}/"
+    except FileNotFoundError:
+        return f"   ⏭️  Skipped (not found): {dir_path}"
+    except Exception as e:
+        return f"   ❌ Failed to clean {dir_path}: {e}"
+
+def cleanup_repository(dry_run=False):
     """Remove unused files and keep only essential ones"""
     
     print("🧹 Cleaning up repository...")
@@ -19,9 +68,19 @@ def cleanup_repository():
         'main_test.py',
         'ai_engine.py', 
         'config.py',
+        'env.py',
         'supabase_manager.py',
         'requirements.txt',
         
+        # Database migrations
+        'migrations/001_results_session_id.sql',
+        'migrations/002_get_eval_stats.sql',
+        'migrations/003_results_indexes.sql',
+        'migrations/004_results_candidate_index.sql',
+        'migrations/005_ping.sql',
+        'migrations/006_eval_stats_mv.sql',
+        'migrations/mysql/001_results_session_id.sql',
+        
         # Templates (only the ones actually used)
         'templates/index.html',
         'templates/results.html',
@@ -65,55 +124,58 @@ def cleanup_repository():
     # Remove unused files
     print("🗑️  Removing unused files...")
     for file_path in files_to_remove:
-        if os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-                print(f"   ✅ Removed: {file_path}")
-            except Exception as e:
-                print(f"   ❌ Failed to remove {file_path}: {e}")
-        else:
+        if dry_run:
+            if _exists(file_path):
+                print(f"   🔍 Would remove: {file_path}")
+            else:
+                print(f"   ⏭️  Skipped (not found): {file_path}")
+            continue
+        try:
+            os.unlink(file_path)
+            print(f"   ✅ Removed: {file_path}")
+        except FileNotFoundError:
             print(f"   ⏭️  Skipped (not found): {file_path}")
+        except OSError as e:
+            print(f"   ❌ Failed to remove {file_path}: {e}")
+        _scan_cache.pop(os.path.dirname(file_path) or '.', None)
     
     # Clean directories (remove contents but keep directory)
     print("\n🧹 Cleaning directories...")
-    for dir_path in dirs_to_clean:
-        if os.path.exists(dir_path):
-            try:
-                # Remove all contents but keep the directory
-                for item in os.listdir(dir_path):
-                    item_path = os.path.join(dir_path, item)
-                    if os.path.isfile(item_path):
-                        os.remove(item_path)
-                    elif os.path.isdir(item_path):
-                        shutil.rmtree(item_path)
-                print(f"   ✅ Cleaned: {dir_path}/")
-            except Exception as e:
-                print(f"   ❌ Failed to clean {dir_path}: {e}")
-        else:
-            print(f"   ⏭️  Skipped (not found): {dir_path}")
+    # Directories are independent, so purge them concurrently and report in order
+    with ThreadPoolExecutor(max_workers=min(8, len(dirs_to_clean))) as executor:
+        for message in executor.map(lambda dir_path: _clean_dir(dir_path, dry_run), dirs_to_clean):
+            print(message)
     
     # Create .gitkeep files to preserve empty directories
     print("\n📁 Preserving directory structure...")
-    for dir_path in dirs_to_clean:
-        if os.path.exists(dir_path):
-            gitkeep_path = os.path.join(dir_path, '.gitkeep')
-            if not os.path.exists(gitkeep_path):
-                try:
-                    with open(gitkeep_path, 'w') as f:
-                        f.write("# This file ensures the directory is preserved in git\n")
-                    print(f"   ✅ Created: {gitkeep_path}")
-                except Exception as e:
-                    print(f"   ❌ Failed to create {gitkeep_path}: {e}")
+    for dir_path in dirs_to_clean if not dry_run else ():
+        gitkeep_path = os.path.join(dir_path, '.gitkeep')
+        try:
+            # 'x' creates the file only if it doesn't exist yet, in a single call
+            with open(gitkeep_path, 'x') as f:
+                f.write("# This file ensures the directory is preserved in git\n")
+            print(f"   ✅ Created: {gitkeep_path}")
+        except (FileExistsError, FileNotFoundError):
+            pass  # already preserved, or the directory doesn't exist
+        except OSError as e:
+            print(f"   ❌ Failed to create {gitkeep_path}: {e}")
     
     # Summary
     print("\n" + "=" * 50)
     print("📋 Repository Cleanup Summary")
     print("=" * 50)
     print("✅ Essential files preserved:")
+    # Cached directory reads instead of one stat per essential file
     for file_path in essential_files:
-        if os.path.exists(file_path):
+        if _exists(file_path):
             print(f"   - {file_path}")
     
+    if dry_run:
+        print(f"\n🔍 Would remove {len(files_to_remove)} unused files")
+        print(f"🔍 Would clean {len(dirs_to_clean)} directories")
+        print("\n🔍 Dry run completed, nothing was removed")
+        return
+    
     print(f"\n🗑️  Removed {len(files_to_remove)} unused files")
     print(f"🧹 Cleaned {len(dirs_to_clean)} directories")
     print("\n🎉 Repository cleanup completed!")
@@ -122,5 +184,34 @@ def cleanup_repository():
     print("   2. Commit the cleanup to git")
     print("   3. Test the application to ensure everything works")
 
+def cleanup_test_data(pattern='Test Candidate', dry_run=False):
+    """Delete test evaluation results from Supabase in a single statement"""
+    print(f"\n🗄️  Cleaning test data matching {pattern!r}...")
+    if dry_run:
+        print(f"   🔍 Would delete results whose candidate name matches {pattern!r}")
+        return
+    
+    from supabase_manager import get_supabase_manager
+    deleted_count = get_supabase_manager().delete_results_by_name_pattern(pattern)
+    print(f"   ✅ Deleted {deleted_count} test results")
+
+def main(argv=None):
+    """Run the repository and/or database cleanup"""
+    parser = argparse.ArgumentParser(description="Clean up the repository and test data")
+    parser.add_argument('--dry-run', action='store_true', help="show what would be removed without removing it")
+    subcommands = parser.add_subparsers(dest='command')
+    subcommands.add_parser('repo', help="remove unused files and clean working directories (default)")
+    for name, help_text in (('db', "delete test results from Supabase"), ('all', "run both cleanups")):
+        subcommand = subcommands.add_parser(name, help=help_text)
+        subcommand.add_argument('--pattern', default='Test Candidate',
+                                help="LIKE pattern for test candidate names, e.g. 'Test%%'")
+    args = parser.parse_args(argv)
+    
+    command = args.command or 'repo'
+    if command in ('repo', 'all'):
+        cleanup_repository(args.dry_run)
+    if command in ('db', 'all'):
+        cleanup_test_data(args.pattern, args.dry_run)
+
 if __name__ == "__main__":
-    cleanup_repository() 
\ No newline at end of file
+    main() 
\ No newline at end of file
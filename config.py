@@ -2,9 +2,10 @@
 Configuration settings for the Resume Evaluator application
 """
 import os
-from dotenv import load_dotenv
+from dataclasses import dataclass
+from env import load_env
 
-load_dotenv()
+load_env()
 
 class Config:
     """Base configuration class"""
@@ -17,6 +18,16 @@ class Config:
     SUPABASE_KEY = os.getenv('SUPABASE_KEY')
     SUPABASE_ANON_KEY = os.getenv('SUPABASE_ANON_KEY')
     
+    # HTTP pool of the Supabase REST client, sockets to PostgREST rather than database connections
+    POOL_MAX_CONNS = int(os.getenv('POOL_MAX_CONNS', 20))
+    POOL_KEEPALIVE_CONNS = int(os.getenv('POOL_KEEPALIVE_CONNS', 10))
+    POOL_KEEPALIVE_EXPIRY = float(os.getenv('POOL_KEEPALIVE_EXPIRY', 30))
+    POOL_CONNECT_TIMEOUT = float(os.getenv('POOL_CONNECT_TIMEOUT', 2))
+    POOL_READ_TIMEOUT = float(os.getenv('POOL_READ_TIMEOUT', 30))  # supabase-py's postgrest_client_timeout
+    POOL_TIMEOUT = float(os.getenv('POOL_TIMEOUT', 30))  # wait for a free connection in the pool
+    SUPABASE_READ_CACHE_TTL = float(os.getenv('SUPABASE_READ_CACHE_TTL', 30))  # statistics and session listings
+    SUPABASE_STATS_VIEW = os.getenv('SUPABASE_STATS_VIEW', 'false').lower() == 'true'  # read statistics from eval_stats_mv
+    
     # Legacy MySQL Configuration (for migration)
     MYSQL_HOST = os.getenv('MYSQL_HOST', 'localhost')
     MYSQL_USER = os.getenv('MYSQL_USER', 'root')
@@ -30,7 +41,8 @@ class Config:
     # File Upload Configuration
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'uploads')
     MAX_CONTENT_LENGTH = int(os.getenv('MAX_FILE_SIZE_MB', 16)) * 1024 * 1024  # 16MB default
-    ALLOWED_EXTENSIONS = {'pdf', 'docx', 'txt'}
+    ALLOWED_EXTENSIONS = frozenset({'pdf', 'docx', 'txt'})
+    ALLOWED_SUFFIXES = frozenset({'.' + extension for extension in ALLOWED_EXTENSIONS})  # for os.path.splitext
     MAX_RESUMES_PER_BATCH = int(os.getenv('MAX_RESUMES_PER_BATCH', 50))
     
     # AI Configuration
@@ -39,6 +51,7 @@ class Config:
     AI_TEMPERATURE = float(os.getenv('AI_TEMPERATURE', 0.1))
     AI_MAX_TOKENS = int(os.getenv('AI_MAX_TOKENS', 4000))
     AI_TIMEOUT = int(os.getenv('AI_TIMEOUT', 300))
+    AI_MODEL = os.getenv('AI_MODEL', 'openai/gpt-3.5-turbo')
     
     # Logging Configuration
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
@@ -70,6 +83,16 @@ class TestingConfig(Config):
     TESTING = True
     MYSQL_DB = os.getenv('MYSQL_TEST_DB', 'resume_evaluator_test')
 
+@dataclass(frozen=True, slots=True)
+class AIParams:
+    """LLM parameters converted once from the environment"""
+    temperature: float
+    max_tokens: int
+    timeout: int
+    model: str
+
+AI_PARAMS = AIParams(Config.AI_TEMPERATURE, Config.AI_MAX_TOKENS, Config.AI_TIMEOUT, Config.AI_MODEL)
+
 # Configuration dictionary
 config = {
     'development': DevelopmentConfig,
@@ -0,0 +1,12 @@
+"""
+Environment loading shared by the Resume Evaluator modules
+"""
+from functools import lru_cache
+
+@lru_cache(maxsize=1)
+def load_env():
+    """Load .env into os.environ once per process"""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+load_env()
@@ -1,44 +1,151 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, send_file
-from dotenv import load_dotenv
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, send_from_directory, stream_with_context
+from werkzeug.utils import secure_filename
+from env import load_env
+import csv
 import json
+import orjson
 import re
-from ai_engine import extract_text, enhanced_crew
+from ai_engine import extract_text, evaluate_resume, evaluate_resumes
 import os
-import pandas as pd
 import uuid
 import tempfile
 import logging
+from logging.handlers import QueueHandler, QueueListener
+import atexit
+import queue
 import datetime
-import traceback
 from typing import Dict, List, Any, Optional
 import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+import multiprocessing
+from functools import lru_cache
+from collections import OrderedDict, deque
+import copy
+import hashlib
+import itertools
+import math
+import threading
 from config import Config
 from supabase_manager import get_supabase_manager
 
+def _debug_output() -> bool:
+    """Whether the verbose console dumps are wanted, they format large texts so production skips them"""
+    # Same switch as the crew's verbosity, the root logger level is pinned by ai_engine's basicConfig
+    return Config.LOG_LEVEL == 'DEBUG'
+
+def _peek(value: Any, n: int = 100) -> str:
+    """Short preview of a value for logs without formatting all of a large payload"""
+    if isinstance(value, (dict, list)):
+        return orjson.dumps(value)[:n].decode('utf-8', 'ignore')
+    if isinstance(value, str):
+        return value[:n]
+    return str(value)[:n]
+
+# Resume text extraction is CPU-bound, run it in worker processes started with spawn (forking Flask is unsafe)
+EXTRACT_WORKERS = int(os.getenv('EXTRACT_WORKERS', min(4, os.cpu_count() or 1)))
+
+_extract_pool: Optional[ProcessPoolExecutor] = None
+_extract_pool_lock = threading.Lock()
+
+def _get_extract_pool() -> ProcessPoolExecutor:
+    """Process pool for text extraction, created on first use and reused across requests"""
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is None:
+            _extract_pool = ProcessPoolExecutor(max_workers=EXTRACT_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+        return _extract_pool
+
+def _discard_extract_pool(pool: ProcessPoolExecutor):
+    """Drop a pool broken by a crashed worker, the next _get_extract_pool() call spawns a fresh one"""
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is pool:
+            _extract_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+@lru_cache(maxsize=32)
+def _extract_cached(path: str, mtime_ns: int, size: int) -> str:
+    """Extract a file's text once per version of the file, a retained job description is parsed only on upload"""
+    return extract_text(path)
+
+# Parsed evaluations by resume + job description, re-uploads skip the LLM pipeline entirely
+EVALUATION_CACHE_SIZE = int(os.getenv('EVALUATION_CACHE_SIZE', 512))
+_evaluation_cache: "OrderedDict[str, dict]" = OrderedDict()
+_evaluation_cache_lock = threading.Lock()
+
+def _evaluation_key(resume_text: str, job_description: str) -> str:
+    """Cache key of an evaluation, a changed job description file changes its text and so the key"""
+    return hashlib.sha256(f"{resume_text}\0{job_description}".encode('utf-8')).hexdigest()
+
+def _cached_evaluation(key: str) -> Optional[dict]:
+    """Copy of a cached evaluation, or None on a miss"""
+    with _evaluation_cache_lock:
+        result = _evaluation_cache.get(key)
+        if result is None:
+            return None
+        _evaluation_cache.move_to_end(key)
+    return copy.deepcopy(result)
+
+def _cache_evaluation(key: str, result: dict):
+    """Remember an evaluation, dropping the least recently used one when full"""
+    result = copy.deepcopy(result)
+    with _evaluation_cache_lock:
+        _evaluation_cache[key] = result
+        _evaluation_cache.move_to_end(key)
+        if len(_evaluation_cache) > EVALUATION_CACHE_SIZE:
+            _evaluation_cache.popitem(last=False)
+
+# Candidate name heuristics, compiled once instead of per resume
+_NAME_PATTERNS = (
+    re.compile(r'^([A-Z][a-z]+ [A-Z][a-z]+)'),  # First Last
+    re.compile(r'([A-Z][a-z]+ [A-Z][a-z]+ [A-Z][a-z]+)'),  # First Middle Last
+    re.compile(r'([A-Z][A-Z]+ [A-Z][a-z]+)'),  # FIRST Last
+)
+_PLACEHOLDER_NAMES = frozenset({
+    "john doe", "jane smith", "[candidate name]", "unknown",
+    "john smith", "jane doe", "candidate", "applicant", "test user",
+    "sample candidate", "example candidate", "demo user"
+})
+# Evaluation fields stored as JSON columns, decoded once here before results reach the database
+JSON_FIELDS = ('extracted_skills', 'previous_roles', 'certifications', 'interview_questions')
+
+def _decode_json_fields(evaluation):
+    """Replace stringified JSON fields of an evaluation with the decoded objects"""
+    for field in JSON_FIELDS:
+        value = evaluation.get(field)
+        if isinstance(value, str):
+            try:
+                evaluation[field] = orjson.loads(value)
+            except orjson.JSONDecodeError:
+                logging.warning("Field %s is not valid JSON, keeping it as text", field)
+    return evaluation
+
+# C-implemented scanner that decodes one JSON value and reports where it ended
+_JSON_DECODER = json.JSONDecoder()
+
 def first_json_block(text: str) -> dict:
     """Return the first top-level JSON object found in text."""
-    # Try to find the complete JSON object by counting braces
     start = text.find('{')
     if start == -1:
         raise ValueError("No JSON object found in LLM output")
     
-    brace_count = 0
-    end = start
-    
-    for i in range(start, len(text)):
-        if text[i] == '{':
-            brace_count += 1
-        elif text[i] == '}':
-            brace_count -= 1
-            if brace_count == 0:
-                end = i + 1
-                break
-    
-    if brace_count != 0:
-        raise ValueError("Incomplete JSON object found in LLM output")
+    # Fast path: usually the widest brace-delimited span is the whole object
+    end = text.rfind('}') + 1
+    try:
+        obj = orjson.loads(text[start:end])
+        if isinstance(obj, dict):
+            return obj
+    except orjson.JSONDecodeError:
+        pass
     
-    json_str = text[start:end]
-    return json.loads(json_str)
+    # Otherwise decode just the first object, ignoring whatever follows it
+    try:
+        obj, _end = _JSON_DECODER.raw_decode(text, start)
+        return obj
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Incomplete JSON object found in LLM output: {e}") from e
 
 def extract_complete_evaluation(raw_output: str) -> dict:
     """
@@ -64,27 +171,15 @@ def extract_complete_evaluation(raw_output: str) -> dict:
             start = raw_str.find('{', start)
             if start == -1:
                 break
-                
-            brace_count = 0
-            end = start
-            
-            for i in range(start, len(raw_str)):
-                if raw_str[i] == '{':
-                    brace_count += 1
-                elif raw_str[i] == '}':
-                    brace_count -= 1
-                    if brace_count == 0:
-                        end = i + 1
-                        break
             
-            if end > start:
-                try:
-                    json_str = raw_str[start:end]
-                    json_obj = json.loads(json_str)
-                    json_blocks.append(json_obj)
-                except json.JSONDecodeError:
-                    pass
+            try:
+                json_obj, end = _JSON_DECODER.raw_decode(raw_str, start)
+            except json.JSONDecodeError:
+                start += 1
+                continue
             
+            if isinstance(json_obj, dict):
+                json_blocks.append(json_obj)
             start = end
         
         # Find the block with the most complete evaluation data
@@ -117,7 +212,7 @@ def extract_complete_evaluation(raw_output: str) -> dict:
         return evaluation
         
     except Exception as e:
-        logging.error(f"Error extracting complete evaluation: {e}")
+        logging.error("Error extracting complete evaluation: %s", e)
         # Fallback to original method
         return first_json_block(raw_output)
 
@@ -129,12 +224,23 @@ app.config['UPLOAD_FOLDER'] = 'uploads/'  # Directory for uploaded files
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # Limit file size to 16 MB
 app.secret_key = 'a_super_secret_key_12345'  # Use a secure random string
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+TEXT_CACHE_DIR = os.path.join(app.config['UPLOAD_FOLDER'], '.cache')  # Extracted resume texts by file hash
+TEXT_CACHE_MAX_ENTRIES = int(os.getenv('TEXT_CACHE_MAX_ENTRIES', 1000))  # least recently used texts beyond this are pruned
+app.data_flow_log = deque(maxlen=50)  # Most recent monitor_data_flow records for debugging
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Hand records to a background thread so request threads never block on stream writes
+_log_queue = queue.SimpleQueue()
+_root_logger = logging.getLogger()
+_log_listener = QueueListener(_log_queue, *_root_logger.handlers, respect_handler_level=True)
+_root_logger.handlers = [QueueHandler(_log_queue)]
+_log_listener.start()
+atexit.register(_log_listener.stop)  # Flush whatever is still queued on shutdown
+
 # Load environment variables
-load_dotenv()
+load_env()
 
 # Database Configuration
 # Use Supabase by default, fallback to MySQL if specified
@@ -152,129 +258,94 @@ if DATABASE_TYPE == 'mysql':
     app.config['MYSQL_CURSORCLASS'] = 'DictCursor'
 
     mysql = MySQL(app)
+    supabase_manager = None
 else:
-    # Supabase configuration
+    # Supabase configuration, one manager (and keep-alive connection pool) for the whole process
     mysql = None
+    supabase_manager = get_supabase_manager()
 
-def insert_results_into_db(results):
-    """Insert results into database (supports both MySQL and Supabase)"""
+def insert_results_into_db(results, session_id):
+    """Insert results of one browser session into database (supports both MySQL and Supabase)"""
     try:
+        # Handle both list of lists and flat list
+        if results and isinstance(results[0], list):
+            rows = list(itertools.chain.from_iterable(results))
+        else:
+            rows = list(results)
+        
         if DATABASE_TYPE == 'mysql':
-            # MySQL insertion
+            # MySQL insertion, all rows in one executemany round-trip
             cur = mysql.connection.cursor()
-            
-            # Handle both list of lists and flat list
-            if isinstance(results[0], list):
-                # List of lists format
-                for resume_list in results:
-                    for resume in resume_list:
-                        cur.execute("""
-                            INSERT INTO hr_resume_results (
-                                candidate_name,
-                                overall_score,
-                                tag,
-                                explanation,
-                                feedback
-                            ) VALUES (%s, %s, %s, %s, %s)
-                        """, (
-                            resume.get('candidate_name'),
-                            resume.get('overall_score'),
-                            resume.get('qualification_tag'),
-                            resume.get('explanation'),
-                            resume.get('feedback')
-                        ))
-            else:
-                # Flat list format
-                for resume in results:
-                    cur.execute("""
-                        INSERT INTO hr_resume_results (
-                            candidate_name,
-                            overall_score,
-                            tag,
-                            explanation,
-                            feedback
-                        ) VALUES (%s, %s, %s, %s, %s)
-                    """, (
-                        resume.get('candidate_name'),
-                        resume.get('overall_score'),
-                        resume.get('qualification_tag'),
-                        resume.get('explanation'),
-                        resume.get('feedback')
-                    ))
+            cur.executemany("""
+                INSERT INTO hr_resume_results (
+                    session_id,
+                    candidate_name,
+                    overall_score,
+                    tag,
+                    explanation,
+                    feedback
+                ) VALUES (%s, %s, %s, %s, %s, %s)
+            """, [(
+                session_id,
+                resume.get('candidate_name'),
+                resume.get('overall_score'),
+                resume.get('qualification_tag'),
+                resume.get('explanation'),
+                resume.get('feedback')
+            ) for resume in rows])
             mysql.connection.commit()
             cur.close()
             print("✅ All results inserted successfully into MySQL database.")
         else:
             # Supabase insertion
-            supabase_manager = get_supabase_manager()
-            
             # Convert results to Supabase format
             supabase_results = []
             
-            # Handle both list of lists and flat list
-            if isinstance(results[0], list):
-                # List of lists format
-                for resume_list in results:
-                    for resume in resume_list:
-                        # Debug: Check interview questions before Supabase insertion
-                        if resume.get('interview_questions'):
-                            logging.info(f"✅ Interview questions found for {resume.get('candidate_name')} before Supabase insertion")
-                            logging.info(f"📝 Interview questions: {resume['interview_questions']}")
-                        else:
-                            logging.warning(f"❌ No interview questions for {resume.get('candidate_name')} before Supabase insertion")
-                        
-                        supabase_result = {
-                            'candidate_name': resume.get('candidate_name'),
-                            'overall_score': resume.get('overall_score'),
-                            'qualification_tag': resume.get('qualification_tag'),  # Use new key name
-                            'explanation': resume.get('recommendations'),   # Use recommendations field
-                            'feedback': "Strengths: " + ", ".join(resume.get('strengths', [])),
-                            'interview_questions': resume.get('interview_questions', {}),  # Include interview questions
-                            'evaluated_at': datetime.datetime.now(datetime.timezone.utc).isoformat()
-                        }
-                        
-                        # Debug: Check what's being inserted
-                        logging.info(f"🔍 Supabase result for {resume.get('candidate_name')}: interview_questions = {supabase_result.get('interview_questions')}")
-                        # Store filename in explanation for now (we'll enhance this later)
-                        if resume.get('resume_filename'):
-                            supabase_result['explanation'] = f"[RESUME_FILE:{resume.get('resume_filename')}] {resume.get('recommendations', '')}"
-                        supabase_results.append(supabase_result)
-            else:
-                # Flat list format
-                for resume in results:
-                    # Debug: Check interview questions before Supabase insertion
-                    if resume.get('interview_questions'):
-                        logging.info(f"✅ Interview questions found for {resume.get('candidate_name')} before Supabase insertion (flat)")
-                        logging.info(f"📝 Interview questions: {resume['interview_questions']}")
-                    else:
-                        logging.warning(f"❌ No interview questions for {resume.get('candidate_name')} before Supabase insertion (flat)")
-                    
-                    supabase_result = {
-                        'candidate_name': resume.get('candidate_name'),
-                        'overall_score': resume.get('overall_score'),
-                        'qualification_tag': resume.get('qualification_tag'),  # Use new key name
-                        'explanation': resume.get('recommendations'),   # Use recommendations field
-                        'feedback': "Strengths: " + ", ".join(resume.get('strengths', [])),
-                        'interview_questions': resume.get('interview_questions', {}),  # Include interview questions
-                        'evaluated_at': datetime.datetime.now(datetime.timezone.utc).isoformat()
-                    }
-                    
-                    # Debug: Check what's being inserted
-                    logging.info(f"🔍 Supabase result for {resume.get('candidate_name')} (flat): interview_questions = {supabase_result.get('interview_questions')}")
-                    # Store filename in explanation for now (we'll enhance this later)
-                    if resume.get('resume_filename'):
-                        supabase_result['explanation'] = f"[RESUME_FILE:{resume.get('resume_filename')}] {resume.get('recommendations', '')}"
-                    supabase_results.append(supabase_result)
+            for resume in rows:
+                # Debug: Check interview questions before Supabase insertion
+                if resume.get('interview_questions'):
+                    logging.info("✅ Interview questions found for %s before Supabase insertion", resume.get('candidate_name'))
+                    logging.info("📝 Interview questions: %s", resume['interview_questions'])
+                else:
+                    logging.warning("❌ No interview questions for %s before Supabase insertion", resume.get('candidate_name'))
+                
+                supabase_result = {
+                    'session_id': session_id,
+                    'candidate_name': resume.get('candidate_name'),
+                    'overall_score': resume.get('overall_score'),
+                    'qualification_tag': resume.get('qualification_tag'),  # Use new key name
+                    'explanation': resume.get('recommendations'),   # Use recommendations field
+                    'feedback': "Strengths: " + ", ".join(resume.get('strengths', [])),
+                    'interview_questions': resume.get('interview_questions', {}),  # Include interview questions
+                    'evaluated_at': datetime.datetime.now(datetime.timezone.utc).isoformat()
+                }
+                
+                # Debug: Check what's being inserted
+                logging.info("🔍 Supabase result for %s: interview_questions = %s", resume.get('candidate_name'), supabase_result.get('interview_questions'))
+                # Store filename in explanation for now (we'll enhance this later)
+                if resume.get('resume_filename'):
+                    supabase_result['explanation'] = f"[RESUME_FILE:{resume.get('resume_filename')}] {resume.get('recommendations', '')}"
+                supabase_results.append(supabase_result)
             
-            # Insert into Supabase
+            # Insert into Supabase in one bulk request
             inserted_ids = supabase_manager.insert_multiple_results(supabase_results)
             print(f"✅ All results inserted successfully into Supabase database. {len(inserted_ids)} records inserted.")
             
-    except Exception as e:
-        print("❌ Error inserting results:")
-        traceback.print_exc()
+    except Exception:
+        logging.exception("❌ Error inserting results into the %s database", DATABASE_TYPE)
 
 
+def _stored_filename(filename: str) -> str:
+    """Unique name an upload is saved under, a sanitized stem plus the original extension"""
+    original = Path(filename)
+    # secure_filename drops non-ASCII characters, so '简历.pdf' would lose its extension if sanitized whole
+    extension = secure_filename(original.suffix.lstrip('.')).lower()
+    suffix = f".{extension}" if extension else ''
+    stem = secure_filename(original.stem)
+    # Unique prefix so uploads sharing a name, e.g. two Resume.pdf files, never write to the same path
+    prefix = uuid.uuid4().hex
+    return f"{prefix}_{stem}{suffix}" if stem else f"{prefix}{suffix}"
+
 def save_file(file, upload_folder):
     """
     Save an uploaded file to the specified folder and return the file path.
@@ -282,12 +353,12 @@ def save_file(file, upload_folder):
     try:
         if not file or file.filename == '':
             raise ValueError("File is missing.")
-        file_path = os.path.join(upload_folder, file.filename)
+        file_path = os.path.join(upload_folder, _stored_filename(file.filename))
         file.save(file_path)
-        logging.info(f"File saved at: {file_path}")
+        logging.info("File saved at: %s", file_path)
         return file_path
     except Exception as e:
-        logging.error(f"Error saving file: {e}")
+        logging.error("Error saving file: %s", e)
         raise
 
 def read_temp_file(file_path):
@@ -295,12 +366,100 @@ def read_temp_file(file_path):
     Read the content of a temporary file and return its contents.
     """
     try:
-        with open(file_path, 'r') as f:
-            return f.read()
+        return Path(file_path).read_text(encoding='utf-8', errors='replace')
     except Exception as e:
-        logging.error(f"Error reading temporary file: {e}")
+        logging.error("Error reading temporary file: %s", e)
         raise
 
+def _text_cache_path(file_path: str) -> str:
+    """Cache file of a resume's extracted text, named by the sha256 of the file contents"""
+    digest = hashlib.sha256(Path(file_path).read_bytes()).hexdigest()
+    return os.path.join(TEXT_CACHE_DIR, f"{digest}.txt")
+
+def _store_cached_text(cache_path: str, extraction: Future):
+    """Write a finished extraction to the text cache, atomically so readers never see a partial file"""
+    if extraction.cancelled() or extraction.exception() is not None:
+        return
+    try:
+        os.makedirs(TEXT_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{cache_path}.{uuid.uuid4().hex}.tmp"
+        Path(tmp_path).write_text(extraction.result(), encoding='utf-8')
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logging.warning("Could not cache extracted text at %s: %s", cache_path, e)
+        return
+    _prune_text_cache()
+
+def _prune_text_cache():
+    """Delete the least recently used cached texts beyond TEXT_CACHE_MAX_ENTRIES, hits refresh an entry's mtime"""
+    try:
+        with os.scandir(TEXT_CACHE_DIR) as entries:
+            cached = [(entry.stat().st_mtime, entry.path) for entry in entries if entry.name.endswith('.txt')]
+    except OSError as e:
+        logging.warning("Could not list the text cache: %s", e)
+        return
+    
+    excess = len(cached) - TEXT_CACHE_MAX_ENTRIES
+    if excess <= 0:
+        return
+    for _, path in sorted(cached)[:excess]:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass  # already pruned by a concurrent write
+
+def _start_extraction(file_path: str, pool: Optional[ProcessPoolExecutor]) -> Future:
+    """Future text of a saved resume, read from the text cache when the same file was extracted before"""
+    extraction = Future()
+    try:
+        cache_path = _text_cache_path(file_path)
+    except OSError as e:
+        # An unreadable or vanished upload fails through its future, as a per-file error of the batch
+        extraction.set_exception(e)
+        return extraction
+    
+    try:
+        cached_text = Path(cache_path).read_text(encoding='utf-8')
+    except OSError:
+        cached_text = None  # not cached yet, or an unreadable cache entry that extraction replaces
+    if cached_text is not None:
+        try:
+            os.utime(cache_path)  # mark as recently used so pruning keeps it
+        except OSError:
+            pass
+        extraction.set_result(cached_text)
+        return extraction
+    
+    if pool is not None:
+        try:
+            extraction = pool.submit(extract_text, file_path)
+        except BrokenProcessPool as e:
+            # Surfaces through the returned future, where _extraction_result retries it in a fresh pool
+            extraction.set_exception(e)
+            return extraction
+    else:
+        try:
+            extraction.set_result(extract_text(file_path))
+        except Exception as e:
+            extraction.set_exception(e)
+    extraction.add_done_callback(lambda done: _store_cached_text(cache_path, done))
+    return extraction
+
+def _extraction_result(extraction: Future, file_path: str, pool: Optional[ProcessPoolExecutor]) -> str:
+    """Text of a started extraction, retried alone in a fresh pool when a crashed worker broke the shared one"""
+    try:
+        return extraction.result()
+    except BrokenProcessPool:
+        # The crash may have come from another resume, so this file gets one retry of its own
+        logging.warning("Extraction pool broke, retrying %s in a fresh pool", file_path)
+        _discard_extract_pool(pool)
+        retry_pool = _get_extract_pool()
+        try:
+            return _start_extraction(file_path, retry_pool).result()
+        except BrokenProcessPool:
+            _discard_extract_pool(retry_pool)
+            raise
+
 @app.route('/', methods=['GET', 'POST'])
 def home():
     """Enhanced home route with better error handling and processing"""
@@ -311,10 +470,10 @@ def home():
             
     except ValueError as ve:
         error = str(ve)
-        logging.warning(f"Validation error: {error}")
+        logging.warning("Validation error: %s", error)
     except Exception as e:
         error = "An unexpected error occurred. Please try again."
-        logging.error(f"Unexpected error: {e}", exc_info=True)
+        logging.error("Unexpected error: %s", e, exc_info=True)
 
     # Render the new modern homepage
     return render_template('index.html', 
@@ -322,20 +481,131 @@ def home():
                          current_job_desc=session.get('job_description_file'),
                          current_file_name=session.get('file_name'))
 
+class EvaluationError(Exception):
+    """Failed resume evaluation, carrying the message to flash to the user"""
+    
+    def __init__(self, message, flash_message):
+        super().__init__(message)
+        self.flash_message = flash_message
+
+def evaluate_one(resume_file, stored_name, resume_text, candidate_name, raw_json, job_description):
+    """Parse, validate and if needed retry one resume evaluation, returns the result dict or an EvaluationError"""
+    try:
+        # Final output of the agent pipeline (or the error it raised), parsed for its first JSON block below
+        if isinstance(raw_json, Exception):
+            raise raw_json
+        
+        # Debug: Log the raw AI output
+        logging.info("🔍 Raw AI output for %s:", candidate_name)
+        logging.info("Raw output type: %s", type(raw_json))
+        logging.info("Raw output length: %s", len(str(raw_json)))
+        
+        evaluation_dict = extract_complete_evaluation(raw_json)
+        
+        # Debug: Log what was parsed
+        logging.info("🔍 Parsed evaluation for %s:", candidate_name)
+        logging.info("Parsed keys: %s", list(evaluation_dict.keys()))
+        if 'interview_questions' in evaluation_dict and evaluation_dict['interview_questions']:
+            logging.info("✅ Interview questions found in parsed result")
+            logging.info("Interview question categories: %s", list(evaluation_dict['interview_questions'].keys()))
+        else:
+            logging.warning("❌ No interview_questions found in parsed result")
+
+        # Validate data flow consistency
+        from ai_engine import validate_agent_data_flow
+        validation_result = validate_agent_data_flow(
+            resume_data={'candidate_name': candidate_name, 'resume_text': resume_text[:1000]},  # Sample data
+            job_data={'job_description': job_description[:1000]},  # Sample data
+            evaluation_data=evaluation_dict
+        )
+        
+        if validation_result['overall_status'] == 'FAIL':
+            logging.warning("Data flow validation failed for %s: %s", candidate_name, validation_result)
+        
+        # Check for placeholder names and retry if detected
+        if evaluation_dict["candidate_name"].strip().lower() in _PLACEHOLDER_NAMES:
+            logging.warning("Placeholder name detected: %s. Retrying evaluation...", evaluation_dict['candidate_name'])
+            # Retry the evaluation with enhanced prompts
+            retry_raw_json = evaluate_resume(resume_text, job_description, refresh=True)
+            
+            retry_evaluation_dict = extract_complete_evaluation(retry_raw_json)
+            
+            # Check if retry also has placeholder
+            if retry_evaluation_dict["candidate_name"].strip().lower() in _PLACEHOLDER_NAMES:
+                logging.error("Placeholder name still detected after retry: %s", retry_evaluation_dict['candidate_name'])
+                # Use filename as fallback
+                fallback_name = candidate_name.replace('_', ' ').replace('-', ' ')
+                retry_evaluation_dict["candidate_name"] = fallback_name
+                logging.info("Using filename as candidate name: %s", fallback_name)
+            
+            evaluation_dict = retry_evaluation_dict
+        
+        # ===== LOGGING FINAL OUTPUT =====
+        if _debug_output():
+            print("\n" + "="*80)
+            print("🔍 FINAL AI OUTPUT:")
+            print("="*80)
+            print(f"📄 Raw Output Length: {len(raw_json)}")
+            print(f"📄 First 500 chars: {_peek(raw_json, 500)}...")
+            print("="*80)
+            print()
+        
+        parsed_result = _decode_json_fields(evaluation_dict)  # rename for clarity
+        parsed_result["resume_filename"] = stored_name  # name under UPLOAD_FOLDER, what view_resume serves
+        
+        # Debug: Check interview questions before database insertion
+        if parsed_result.get('interview_questions'):
+            logging.info("✅ Interview questions found in parsed_result for %s", candidate_name)
+            logging.info("📝 Interview questions data: %s", _peek(parsed_result['interview_questions'], 500))
+        else:
+            logging.warning("❌ No interview questions in parsed_result for %s", candidate_name)
+            logging.warning("Available keys: %s", list(parsed_result.keys()))
+
+        # ===== CONSOLE LOGGING FOR AI EVALUATION RESULTS =====
+        if _debug_output():
+            print("\n" + "="*80)
+            print(f"🤖 AI EVALUATION RESULTS FOR: {candidate_name}")
+            print("="*80)
+            print(f"👤 Candidate Name: {parsed_result.get('candidate_name', 'N/A')}")
+            print(f"📊 Overall Score: {parsed_result.get('overall_score', 'N/A')}")
+            print(f"🏷️  Qualification Tag: {parsed_result.get('qualification_tag', 'N/A')}")
+            print(f"📄 Resume Filename: {parsed_result.get('resume_filename', 'N/A')}")
+            print(f"💪 Strengths: {', '.join(parsed_result.get('strengths', []))}")
+            print(f"⚠️  Areas of Concern: {', '.join(parsed_result.get('areas_of_concern', []))}")
+            print(f"📝 Recommendations Preview (first 300 chars):")
+            print("-" * 50)
+            recommendations = parsed_result.get('recommendations', 'No recommendations available')
+            print(recommendations[:300] + "..." if len(recommendations) > 300 else recommendations)
+            print("-" * 50)
+            print("="*80)
+            print()
+            
+        logging.info("OpenRouter evaluation successful: %s (Score: %s)", parsed_result['candidate_name'], parsed_result['overall_score'])
+        
+        return parsed_result
+
+    except Exception as e:
+        error_msg = f"OpenRouter evaluation failed for {resume_file.filename}: {str(e)}"
+        logging.error(error_msg)
+        
+        # Credit, rate limit and server errors were already retried on other keys by the AI engine
+        return EvaluationError(error_msg, f"Evaluation failed for {resume_file.filename}. Please try again.")
+
 def process_evaluation_request():
     """Process the evaluation request with enhanced error handling"""
     start_time = time.time()
     
     # ===== FLASK CONFIRMATION =====
-    print("\n" + "="*80)
-    print("🚀 FLASK APPLICATION CONFIRMED")
-    print("="*80)
-    print("✅ Using Flask web framework")
-    print("✅ Flask app instance: main_test.py")
-    print("✅ Request method: " + request.method)
-    print("✅ Session active: " + str('user_id' in session))
-    print("="*80)
-    print()
+    if _debug_output():
+        print("\n" + "="*80)
+        print("🚀 FLASK APPLICATION CONFIRMED")
+        print("="*80)
+        print("✅ Using Flask web framework")
+        print("✅ Flask app instance: main_test.py")
+        print("✅ Request method: " + request.method)
+        print("✅ Session active: " + str('user_id' in session))
+        print("="*80)
+        print()
     
     # Validate inputs
     retain_job_desc = 'retain_job_desc' in request.form
@@ -363,7 +633,7 @@ def process_evaluation_request():
             job_desc_path = save_file(job_desc_file, app.config['UPLOAD_FOLDER'])
             session['job_description_file'] = job_desc_path
             session['file_name'] = job_desc_file.filename
-            logging.info(f"New job description uploaded: {job_desc_file.filename}")
+            logging.info("New job description uploaded: %s", job_desc_file.filename)
         else:
             raise ValueError("Please provide either a job description file or enter job description text.")
     else:
@@ -376,16 +646,23 @@ def process_evaluation_request():
         raise ValueError("At least one resume file is required.")
 
     # Validate file formats
-    supported_formats = ('.pdf', '.docx', '.txt')
-    valid_files = [f for f in resume_files if f.filename.lower().endswith(supported_formats)]
+    # Split each filename once, the stem doubles as the candidate name below
+    valid_files = [
+        (f, stem, ext.lower())
+        for f in resume_files
+        for stem, ext in [os.path.splitext(f.filename)]
+        if ext.lower() in Config.ALLOWED_SUFFIXES
+    ]
     
     if not valid_files:
         raise ValueError("No supported file formats found. Please upload PDF, DOCX, or TXT files.")
 
-    logging.info(f"Processing {len(valid_files)} resume files")
+    logging.info("Processing %s resume files", len(valid_files))
 
-    # Clear previous results
-    clear_previous_results()
+    # Clear previous results of this browser session only, other users keep theirs
+    eval_session_id = session.get('eval_session_id') or str(uuid.uuid4())
+    session['eval_session_id'] = eval_session_id
+    clear_previous_results(eval_session_id)
 
     # Extract job description text
     if job_description_text:
@@ -395,367 +672,285 @@ def process_evaluation_request():
     else:
         # Extract from file
         job_description_path = session.get('job_description_file')
-        job_description = extract_text(job_description_path)
+        st = os.stat(job_description_path)
+        job_description = _extract_cached(job_description_path, st.st_mtime_ns, st.st_size)
 
     # ===== CONSOLE LOGGING FOR DEBUGGING =====
-    print("\n" + "="*80)
-    print("🔍 EXTRACTED JOB DESCRIPTION DATA:")
-    print("="*80)
-    print(f"📄 Job Description File: {job_description_path}")
-    print(f"📊 Job Description Length: {len(job_description)} characters")
-    print(f"📝 Job Description Preview (first 500 chars):")
-    print("-" * 50)
-    print(job_description[:500] + "..." if len(job_description) > 500 else job_description)
-    print("-" * 50)
-    print("="*80)
-    print()
+    if _debug_output():
+        print("\n" + "="*80)
+        print("🔍 EXTRACTED JOB DESCRIPTION DATA:")
+        print("="*80)
+        print(f"📄 Job Description File: {job_description_path}")
+        print(f"📊 Job Description Length: {len(job_description)} characters")
+        print(f"📝 Job Description Preview (first 500 chars):")
+        print("-" * 50)
+        print(job_description[:500] + "..." if len(job_description) > 500 else job_description)
+        print("-" * 50)
+        print("="*80)
+        print()
 
     # Process each resume
     all_results = []
     processing_errors = []
 
-    for i, resume_file in enumerate(valid_files):
+    # Save and extract every resume first so the AI engine can batch them
+    prepared_resumes = []
+
+    # Save the uploads concurrently, save_file gives each a unique stored name so the writes are independent
+    with ThreadPoolExecutor(max_workers=min(8, len(valid_files))) as executor:
+        saved_paths = [executor.submit(save_file, resume_file, app.config['UPLOAD_FOLDER']) for resume_file, _, _ in valid_files]
+
+    # Extract all saved resumes in parallel unless their text is cached, a single resume is not worth a worker round-trip
+    extract_pool = _get_extract_pool() if len(valid_files) > 1 else None
+    extractions = [
+        _start_extraction(saved.result(), extract_pool) if saved.exception() is None else None
+        for saved in saved_paths
+    ]
+
+    for i, (resume_file, candidate_name, _) in enumerate(valid_files):
         try:
-            logging.info(f"Processing resume {i+1}/{len(valid_files)}: {resume_file.filename}")
+            logging.info("Processing resume %s/%s: %s", i+1, len(valid_files), resume_file.filename)
             
-            # Save and extract resume text
-            resume_path = save_file(resume_file, app.config['UPLOAD_FOLDER'])
-            resume_text = extract_text(resume_path)
-            candidate_name = os.path.splitext(resume_file.filename)[0]
+            # Extract resume text from the saved file
+            resume_path = saved_paths[i].result()
+            resume_text = _extraction_result(extractions[i], resume_path, extract_pool)
 
             # ===== CONSOLE LOGGING FOR RESUME DATA =====
-            print("\n" + "="*80)
-            print(f"📋 RESUME {i+1}/{len(valid_files)}: {resume_file.filename}")
-            print("="*80)
-            print(f"👤 Candidate Name (from filename): {candidate_name}")
-            print(f"📄 Resume File Path: {resume_path}")
-            print(f"📊 Resume Text Length: {len(resume_text)} characters")
-            print(f"📝 Resume Text Preview (first 500 chars):")
-            print("-" * 50)
-            print(resume_text[:500] + "..." if len(resume_text) > 500 else resume_text)
-            print("-" * 50)
+            if _debug_output():
+                print("\n" + "="*80)
+                print(f"📋 RESUME {i+1}/{len(valid_files)}: {resume_file.filename}")
+                print("="*80)
+                print(f"👤 Candidate Name (from filename): {candidate_name}")
+                print(f"📄 Resume File Path: {resume_path}")
+                print(f"📊 Resume Text Length: {len(resume_text)} characters")
+                print(f"📝 Resume Text Preview (first 500 chars):")
+                print("-" * 50)
+                print(resume_text[:500] + "..." if len(resume_text) > 500 else resume_text)
+                print("-" * 50)
             
-            # Check if candidate name appears in resume text
-            if candidate_name.lower() in resume_text.lower():
-                print(f"✅ Candidate name '{candidate_name}' found in resume text")
-            else:
-                print(f"⚠️  Candidate name '{candidate_name}' NOT found in resume text")
-                print(f"🔍 Looking for name patterns in resume...")
-                # Look for common name patterns
-                import re
-                name_patterns = [
-                    r'^([A-Z][a-z]+ [A-Z][a-z]+)',  # First Last
-                    r'([A-Z][a-z]+ [A-Z][a-z]+ [A-Z][a-z]+)',  # First Middle Last
-                    r'([A-Z][A-Z]+ [A-Z][a-z]+)',  # FIRST Last
-                ]
-                for pattern in name_patterns:
-                    matches = re.findall(pattern, resume_text[:1000])  # Check first 1000 chars
+                # Check if candidate name appears in resume text
+                name_in_resume = candidate_name.lower() in resume_text.lower()
+                if name_in_resume:
+                    print(f"✅ Candidate name '{candidate_name}' found in resume text")
+                else:
+                    print(f"⚠️  Candidate name '{candidate_name}' NOT found in resume text")
+                    print(f"🔍 Looking for name patterns in resume...")
+                    # Look for common name patterns in the first 1000 chars
+                    head = resume_text[:1000]
+                    matches = next((pattern.findall(head) for pattern in _NAME_PATTERNS if pattern.search(head)), [])
                     if matches:
                         print(f"🔍 Found potential names: {matches}")
-                        break
-                else:
-                    print("❌ No clear name patterns found in resume")
-            
-            print("="*80)
-            print()
-
-            # Run AI evaluation using OpenRouter only
-            logging.info(f"Running OpenRouter evaluation for: {candidate_name}")
-            
-            result = enhanced_crew.kickoff(inputs={
-                "resume": resume_text,
-                "job_description": job_description,
-            })
-
-            # Get the final output from CrewAI and parse first JSON block
-            if hasattr(result, 'raw'):
-                raw_json = result.raw
-            elif hasattr(result, 'output'):
-                raw_json = result.output
-            elif hasattr(result, 'result'):
-                raw_json = result.result
-            else:
-                # Fallback: try to get the last task's output
-                raw_json = str(result)
-            
-            # Debug: Log the raw AI output
-            logging.info(f"🔍 Raw AI output for {candidate_name}:")
-            logging.info(f"Raw output type: {type(raw_json)}")
-            logging.info(f"Raw output length: {len(str(raw_json))}")
-            
-            evaluation_dict = extract_complete_evaluation(raw_json)
-            
-            # Debug: Log what was parsed
-            logging.info(f"🔍 Parsed evaluation for {candidate_name}:")
-            logging.info(f"Parsed keys: {list(evaluation_dict.keys())}")
-            if 'interview_questions' in evaluation_dict and evaluation_dict['interview_questions']:
-                logging.info(f"✅ Interview questions found in parsed result")
-                logging.info(f"Interview question categories: {list(evaluation_dict['interview_questions'].keys())}")
-            else:
-                logging.warning(f"❌ No interview_questions found in parsed result")
-
-            # Validate data flow consistency
-            from ai_engine import validate_agent_data_flow
-            validation_result = validate_agent_data_flow(
-                resume_data={'candidate_name': candidate_name, 'resume_text': resume_text[:1000]},  # Sample data
-                job_data={'job_description': job_description[:1000]},  # Sample data
-                evaluation_data=evaluation_dict
-            )
-            
-            if validation_result['overall_status'] == 'FAIL':
-                logging.warning(f"Data flow validation failed for {candidate_name}: {validation_result}")
-            
-            # Check for placeholder names and retry if detected
-            placeholder_names = {
-                "john doe", "jane smith", "[candidate name]", "unknown", 
-                "john smith", "jane doe", "candidate", "applicant", "test user",
-                "sample candidate", "example candidate", "demo user"
-            }
-            
-            if evaluation_dict["candidate_name"].lower() in placeholder_names:
-                logging.warning(f"Placeholder name detected: {evaluation_dict['candidate_name']}. Retrying evaluation...")
-                # Retry the evaluation with enhanced prompts
-                retry_result = enhanced_crew.kickoff(inputs={
-                    "resume": resume_text,
-                    "job_description": job_description,
-                })
-                
-                # Parse retry result
-                if hasattr(retry_result, 'raw'):
-                    retry_raw_json = retry_result.raw
-                elif hasattr(retry_result, 'output'):
-                    retry_raw_json = retry_result.output
-                elif hasattr(retry_result, 'result'):
-                    retry_raw_json = retry_result.result
-                else:
-                    retry_raw_json = str(retry_result)
-                
-                retry_evaluation_dict = extract_complete_evaluation(retry_raw_json)
-                
-                # Check if retry also has placeholder
-                if retry_evaluation_dict["candidate_name"].lower() in placeholder_names:
-                    logging.error(f"Placeholder name still detected after retry: {retry_evaluation_dict['candidate_name']}")
-                    # Use filename as fallback
-                    fallback_name = os.path.splitext(resume_file.filename)[0].replace('_', ' ').replace('-', ' ')
-                    retry_evaluation_dict["candidate_name"] = fallback_name
-                    logging.info(f"Using filename as candidate name: {fallback_name}")
-                
-                evaluation_dict = retry_evaluation_dict
-            
-            # ===== LOGGING FINAL OUTPUT =====
-            print("\n" + "="*80)
-            print("🔍 FINAL AI OUTPUT:")
-            print("="*80)
-            print(f"📄 Raw Output Length: {len(str(raw_json))}")
-            print(f"📄 First 500 chars: {str(raw_json)[:500]}...")
-            print("="*80)
-            print()
-            
-            parsed_result = evaluation_dict  # rename for clarity
-            parsed_result["resume_filename"] = resume_file.filename
-            
-            # Debug: Check interview questions before database insertion
-            if parsed_result.get('interview_questions'):
-                logging.info(f"✅ Interview questions found in parsed_result for {candidate_name}")
-                logging.info(f"📝 Interview questions data: {parsed_result['interview_questions']}")
-            else:
-                logging.warning(f"❌ No interview questions in parsed_result for {candidate_name}")
-                logging.warning(f"Available keys: {list(parsed_result.keys())}")
-
-            # ===== CONSOLE LOGGING FOR AI EVALUATION RESULTS =====
-            print("\n" + "="*80)
-            print(f"🤖 AI EVALUATION RESULTS FOR: {candidate_name}")
-            print("="*80)
-            print(f"👤 Candidate Name: {parsed_result.get('candidate_name', 'N/A')}")
-            print(f"📊 Overall Score: {parsed_result.get('overall_score', 'N/A')}")
-            print(f"🏷️  Qualification Tag: {parsed_result.get('qualification_tag', 'N/A')}")
-            print(f"📄 Resume Filename: {parsed_result.get('resume_filename', 'N/A')}")
-            print(f"💪 Strengths: {', '.join(parsed_result.get('strengths', []))}")
-            print(f"⚠️  Areas of Concern: {', '.join(parsed_result.get('areas_of_concern', []))}")
-            print(f"📝 Recommendations Preview (first 300 chars):")
-            print("-" * 50)
-            recommendations = parsed_result.get('recommendations', 'No recommendations available')
-            print(recommendations[:300] + "..." if len(recommendations) > 300 else recommendations)
-            print("-" * 50)
-            print("="*80)
-            print()
-                
-            logging.info(f"OpenRouter evaluation successful: {parsed_result['candidate_name']} (Score: {parsed_result['overall_score']})")
+                    else:
+                        print("❌ No clear name patterns found in resume")
             
-            # Monitor data flow
-            flow_data = monitor_data_flow(resume_file, job_description_path, parsed_result, time.time() - start_time)
+                print("="*80)
+                print()
             
-            all_results.append(parsed_result)
+            prepared_resumes.append((resume_file, os.path.basename(resume_path), resume_text, candidate_name))
 
         except Exception as e:
-            error_msg = f"OpenRouter evaluation failed for {resume_file.filename}: {str(e)}"
+            error_msg = f"Text extraction failed for {resume_file.filename}: {str(e)}"
             logging.error(error_msg)
-            
-            # Check if it's a credit/authentication error and try with different key
-            if "credits" in str(e).lower() or "authentication" in str(e).lower() or "402" in str(e):
-                logging.info(f"Attempting to retry with different API key for {resume_file.filename}")
-                try:
-                    # Import the key manager from ai_engine
-                    from ai_engine import key_manager
-                    
-                    # Mark current key as failed and get a new one
-                    current_key = key_manager.get_current_key()
-                    key_manager.mark_key_failed(current_key)
-                    
-                    # Retry with new key
-                    logging.info(f"Retrying with key {key_manager.get_available_key_count()} available keys")
-                    result = enhanced_crew.kickoff()
-                    
-                    # Parse the result again
-                    if hasattr(result, 'raw'):
-                        raw_json = result.raw
-                    elif hasattr(result, 'output'):
-                        raw_json = result.output
-                    elif hasattr(result, 'result'):
-                        raw_json = result.result
-                    else:
-                        raw_json = str(result)
-                    
-                    evaluation_dict = extract_complete_evaluation(raw_json)
-                    
-                    # Safety check for placeholder names
-                    placeholder_names = {
-                        "john doe", "jane smith", "[candidate name]", "unknown", 
-                        "john smith", "jane doe", "candidate", "applicant", "test user",
-                        "sample candidate", "example candidate", "demo user"
-                    }
-                    
-                    if evaluation_dict["candidate_name"].lower() in placeholder_names:
-                        logging.warning(f"Placeholder name detected in retry: {evaluation_dict['candidate_name']}")
-                        # Use filename as fallback
-                        fallback_name = os.path.splitext(resume_file.filename)[0].replace('_', ' ').replace('-', ' ')
-                        evaluation_dict["candidate_name"] = fallback_name
-                        logging.info(f"Using filename as candidate name: {fallback_name}")
-                    
-                    parsed_result = {
-                        'candidate_name': evaluation_dict['candidate_name'],
-                        'overall_score': evaluation_dict['overall_score'],
-                        'qualification_tag': evaluation_dict['qualification_tag'],
-                        'category_scores': evaluation_dict.get('category_scores', {}),
-                        'strengths': evaluation_dict.get('strengths', []),
-                        'areas_of_concern': evaluation_dict.get('areas_of_concern', []),
-                        'recommendations': evaluation_dict.get('recommendations', ''),
-                        'interview_questions': evaluation_dict.get('interview_questions', {}),
-                        'resume_filename': resume_file.filename
-                    }
-                    
-                    logging.info(f"Retry successful: {parsed_result['candidate_name']} (Score: {parsed_result['overall_score']})")
-                    all_results.append(parsed_result)
-                    continue  # Skip the error handling below
+            processing_errors.append(error_msg)
+            flash(f"Evaluation failed for {resume_file.filename}. Please try again.", "error")
+
+    # Reuse earlier evaluations of the same resume against the same job description
+    pending_resumes = []
+    for resume_file, stored_name, resume_text, candidate_name in prepared_resumes:
+        cache_key = _evaluation_key(resume_text, job_description)
+        cached_result = _cached_evaluation(cache_key)
+        if cached_result is None:
+            pending_resumes.append((cache_key, resume_file, stored_name, resume_text, candidate_name))
+        else:
+            logging.info("Reusing cached evaluation for %s", resume_file.filename)
+            cached_result["resume_filename"] = stored_name
+            all_results.append(cached_result)
+
+    # Run AI evaluation using OpenRouter only, several resumes per LLM call
+    logging.info("Running OpenRouter evaluation for %s resumes", len(pending_resumes))
+    raw_outputs = evaluate_resumes([resume_text for _, _, _, resume_text, _ in pending_resumes], job_description)
+
+    # Post-process every evaluation concurrently, placeholder and credit retries are independent LLM calls
+    # Flash and session access stay on this thread since they need the request context
+    if pending_resumes:
+        with ThreadPoolExecutor(max_workers=min(8, len(pending_resumes))) as executor:
+            futures = {
+                executor.submit(evaluate_one, resume_file, stored_name, resume_text, candidate_name, raw_json,
+                                job_description): (cache_key, resume_file)
+                for (cache_key, resume_file, stored_name, resume_text, candidate_name), raw_json in zip(pending_resumes, raw_outputs)
+            }
+            for future in as_completed(futures):
+                outcome = future.result()
+                if isinstance(outcome, EvaluationError):
+                    processing_errors.append(str(outcome))
+                    flash(outcome.flash_message, "error")
+                else:
+                    cache_key, resume_file = futures[future]
+                    _cache_evaluation(cache_key, outcome)
                     
-                except Exception as retry_error:
-                    logging.error(f"Retry also failed for {resume_file.filename}: {str(retry_error)}")
-                    processing_errors.append(f"Failed after retry: {resume_file.filename} - {str(retry_error)}")
-                    flash(f"Evaluation failed for {resume_file.filename} even after retry. Please try again later.", "error")
-            else:
-                processing_errors.append(error_msg)
-                flash(f"Evaluation failed for {resume_file.filename}. Please try again.", "error")
+                    # Monitor data flow, the record is logged and appended to app.data_flow_log
+                    monitor_data_flow(resume_file, job_description_path, outcome, time.time() - start_time)
+                    all_results.append(outcome)
 
     # Insert results into database
     if all_results:
-        insert_results_into_db(all_results)
+        insert_results_into_db(all_results, eval_session_id)
     
     # ===== FINAL SUMMARY =====
-    print("\n" + "="*80)
-    print("📊 EVALUATION SUMMARY")
-    print("="*80)
-    print(f"✅ Successfully processed: {len(all_results)} resumes")
-    print(f"❌ Failed evaluations: {len(processing_errors)}")
-    print(f"⏱️  Total processing time: {time.time() - start_time:.2f} seconds")
+    if _debug_output():
+        print("\n" + "="*80)
+        print("📊 EVALUATION SUMMARY")
+        print("="*80)
+        print(f"✅ Successfully processed: {len(all_results)} resumes")
+        print(f"❌ Failed evaluations: {len(processing_errors)}")
+        print(f"⏱️  Total processing time: {time.time() - start_time:.2f} seconds")
     
-    if all_results:
-        print(f"📈 Average score: {sum(r.get('overall_score', 0) for r in all_results) / len(all_results):.1f}")
-        print(f"🏷️  Qualification breakdown:")
-        tags = {}
-        for result in all_results:
-            tag = result.get('qualification_tag', 'Unknown')
-            tags[tag] = tags.get(tag, 0) + 1
-        for tag, count in tags.items():
-            print(f"   - {tag}: {count}")
+        if all_results:
+            print(f"📈 Average score: {sum(r.get('overall_score', 0) for r in all_results) / len(all_results):.1f}")
+            print(f"🏷️  Qualification breakdown:")
+            tags = {}
+            for result in all_results:
+                tag = result.get('qualification_tag', 'Unknown')
+                tags[tag] = tags.get(tag, 0) + 1
+            for tag, count in tags.items():
+                print(f"   - {tag}: {count}")
     
-    if processing_errors:
-        print(f"\n❌ Processing Errors:")
-        for error in processing_errors:
-            print(f"   - {error}")
+        if processing_errors:
+            print(f"\n❌ Processing Errors:")
+            for error in processing_errors:
+                print(f"   - {error}")
     
-    print("="*80)
-    print()
+        print("="*80)
+        print()
         
     processing_time = time.time() - start_time
-    logging.info(f"Evaluation completed in {processing_time:.2f} seconds")
+    logging.info("Evaluation completed in %.2f seconds", processing_time)
     
     if processing_errors:
         session['processing_errors'] = processing_errors
 
+    _invalidate_results_cache(eval_session_id)
     return redirect(url_for('results'))
 
-def clear_previous_results():
-    """Clear previous evaluation results"""
+def clear_previous_results(session_id):
+    """Clear previous evaluation results of one browser session"""
     try:
         if DATABASE_TYPE == 'mysql':
             cur = mysql.connection.cursor()
-            cur.execute("TRUNCATE TABLE hr_resume_results")
+            cur.execute("DELETE FROM hr_resume_results WHERE session_id = %s", (session_id,))
             mysql.connection.commit()
             cur.close()
             logging.info("Cleared previous results from MySQL database")
         else:
-            supabase_manager = get_supabase_manager()
-            supabase_manager.clear_all_results()
+            supabase_manager.clear_session_results(session_id)
             logging.info("Cleared previous results from Supabase database")
+        _invalidate_results_cache(session_id)
     except Exception as e:
-        logging.error(f"Error clearing previous results: {e}")
+        logging.error("Error clearing previous results: %s", e)
         raise
 
-@app.route('/results')
-def results():
-    """Enhanced results page with error handling and processing info"""
-    try:
-        if DATABASE_TYPE == 'mysql':
-            cur = mysql.connection.cursor()
+# Last /results query and its statistics per browser session, dropped whenever the stored results change
+RESULTS_CACHE_TTL = float(os.getenv('RESULTS_CACHE_TTL', 10))
+_RESULTS_CACHE: Dict[str, tuple] = {}
+
+def _invalidate_results_cache(session_id):
+    """Make the next /results request of a session query the database again"""
+    _RESULTS_CACHE.pop(session_id, None)
+
+# Supabase columns read back for display, the JSONB analysis blobs are never shown
+RESULT_COLUMNS = 'candidate_name,overall_score,qualification_tag,explanation,feedback,interview_questions'
+CSV_RESULT_COLUMNS = 'candidate_name,overall_score,qualification_tag,explanation,feedback'
+
+def iter_session_results(session_id, batch=1000, columns=RESULT_COLUMNS):
+    """Yield the results of one browser session in the format the templates and exports expect, batch rows at a time"""
+    if not session_id:
+        return
+    
+    if DATABASE_TYPE == 'mysql':
+        cur = mysql.connection.cursor()
+        try:
             cur.execute("""
                 SELECT candidate_name, overall_score, tag, explanation, feedback 
                 FROM hr_resume_results 
+                WHERE session_id = %s
                 ORDER BY overall_score DESC
-            """)
-            results_data = cur.fetchall()
+            """, (session_id,))
+            while True:
+                rows = cur.fetchmany(batch)
+                if not rows:
+                    return
+                yield from rows
+        finally:
             cur.close()
+    
+    # Supabase query, paged with range() so only one batch is held at a time
+    for result in supabase_manager.iter_results(batch, session_id=session_id, columns=columns):
+        # Convert to expected format
+        yield {
+            'candidate_name': result.get('candidate_name'),
+            'overall_score': result.get('overall_score'),
+            'tag': result.get('qualification_tag'),  # Map back to 'tag'
+            'explanation': result.get('explanation'),
+            'feedback': result.get('feedback'),
+            'interview_questions': result.get('interview_questions', {})  # Include interview questions
+        }
+
+def _export_rows(session_id, columns=RESULT_COLUMNS):
+    """Rows of a streamed export, the first page is read here so its errors still fail the request"""
+    rows = iter_session_results(session_id, columns=columns)
+    try:
+        first = next(rows)
+    except StopIteration:
+        return iter(())
+    return _stream_rows(session_id, first, rows)
+
+def _stream_rows(session_id, first, rows):
+    """Yield the remaining export rows, a database error once the 200 went out is logged and ends the stream"""
+    yield first
+    sent = 1
+    try:
+        for row in rows:
+            yield row
+            sent += 1
+    except Exception:
+        logging.exception("Export of session %s truncated after %s rows", session_id, sent)
+
+def fetch_session_results(session_id):
+    """All results of one browser session as a list"""
+    return list(iter_session_results(session_id))
+
+@app.route('/results')
+def results():
+    """Enhanced results page with error handling and processing info"""
+    try:
+        # Dashboards refresh often, reuse the rows and stats of the last few seconds
+        session_id = session.get('eval_session_id')
+        now = time.time()
+        cached = _RESULTS_CACHE.get(session_id)
+        if cached and now - cached[0] < RESULTS_CACHE_TTL:
+            results_data, stats = cached[1]
         else:
-            # Supabase query
-            supabase_manager = get_supabase_manager()
-            supabase_results = supabase_manager.get_all_results()
+            results_data = fetch_session_results(session_id)
+            stats = calculate_results_statistics(results_data)
             
-            # Convert to expected format
-            results_data = []
-            for result in supabase_results:
-                results_data.append({
-                    'candidate_name': result.get('candidate_name'),
-                    'overall_score': result.get('overall_score'),
-                    'tag': result.get('qualification_tag'),  # Map back to 'tag'
-                    'explanation': result.get('explanation'),
-                    'feedback': result.get('feedback'),
-                    'interview_questions': result.get('interview_questions', {})  # Include interview questions
-                })
+            # Drop expired entries of other sessions on the way
+            for stale_id in [sid for sid, (t, _) in list(_RESULTS_CACHE.items()) if now - t >= RESULTS_CACHE_TTL]:
+                _RESULTS_CACHE.pop(stale_id, None)
+            if session_id:
+                _RESULTS_CACHE[session_id] = (now, (results_data, stats))
 
         # Get processing errors from session if any
         processing_errors = session.pop('processing_errors', [])
         
-        # Add some statistics
-        stats = calculate_results_statistics(results_data)
-        
         # Debug: Log interview questions data
         for i, result in enumerate(results_data):
             if result.get('interview_questions'):
-                logging.info(f"Result {i}: Interview questions found for {result['candidate_name']}")
-                logging.info(f"Interview questions: {result['interview_questions']}")
+                logging.info("Result %s: Interview questions found for %s", i, result['candidate_name'])
+                logging.info("Interview questions: %s", result['interview_questions'])
             else:
-                logging.warning(f"Result {i}: No interview questions for {result['candidate_name']}")
+                logging.warning("Result %s: No interview questions for %s", i, result['candidate_name'])
         
-        logging.info(f"Displaying {len(results_data)} evaluation results")
+        logging.info("Displaying %s evaluation results", len(results_data))
 
         return render_template('results.html', 
                              results=results_data,
@@ -763,7 +958,7 @@ def results():
                              processing_errors=processing_errors)
                              
     except Exception as e:
-        logging.error(f"Error fetching results: {e}")
+        logging.error("Error fetching results: %s", e)
         return render_template('results.html', 
                              results=[], 
                              stats={},
@@ -774,139 +969,152 @@ def calculate_results_statistics(results_data):
     if not results_data:
         return {}
     
-    total_candidates = len(results_data)
-    qualified = len([r for r in results_data if r['tag'] == 'QUALIFIED'])
-    not_qualified = len([r for r in results_data if r['tag'] == 'NOT QUALIFIED'])
-    overqualified = len([r for r in results_data if r['tag'] == 'OVERQUALIFIED'])
-    
-    scores = [r['overall_score'] for r in results_data if isinstance(r['overall_score'], (int, float))]
+    # One pass over the rows for the tag counts and the score aggregates
+    qualified = not_qualified = overqualified = 0
+    score_count = 0
+    score_sum = 0.0
+    highest = -math.inf
+    lowest = math.inf
+    for r in results_data:
+        tag = r['tag']
+        if tag == 'QUALIFIED':
+            qualified += 1
+        elif tag == 'NOT QUALIFIED':
+            not_qualified += 1
+        elif tag == 'OVERQUALIFIED':
+            overqualified += 1
+        
+        score = r['overall_score']
+        if isinstance(score, (int, float)):
+            score_count += 1
+            score_sum += score
+            if score > highest:
+                highest = score
+            if score < lowest:
+                lowest = score
     
     return {
-        'total_candidates': total_candidates,
+        'total_candidates': len(results_data),
         'qualified': qualified,
         'not_qualified': not_qualified,
         'overqualified': overqualified,
-        'average_score': sum(scores) / len(scores) if scores else 0,
-        'highest_score': max(scores) if scores else 0,
-        'lowest_score': min(scores) if scores else 0
+        'average_score': score_sum / score_count if score_count else 0,
+        'highest_score': highest if score_count else 0,
+        'lowest_score': lowest if score_count else 0
     }
 
 @app.route('/view_resume/<filename>')
 def view_resume(filename):
     """Serve uploaded resume files for viewing"""
     try:
-        # Security check - ensure filename doesn't contain path traversal
-        if '..' in filename or '/' in filename or '\\' in filename:
+        # Links carry the name from _stored_filename, which secure_filename leaves unchanged
+        # Anything it would alter, such as a path traversal, is not a stored upload
+        if not filename or secure_filename(filename) != filename:
             return "Invalid filename", 400
         
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        
-        if not os.path.exists(file_path):
+        if not os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], filename)):
             return "File not found", 404
         
-        # Determine file type and serve appropriately
-        if filename.lower().endswith('.pdf'):
-            return send_file(file_path, mimetype='application/pdf')
-        elif filename.lower().endswith(('.doc', '.docx')):
-            return send_file(file_path, mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document')
-        else:
-            return send_file(file_path)
+        # Mimetype comes from the extension; conditional enables sendfile, range requests and 304s
+        return send_from_directory(app.config['UPLOAD_FOLDER'], filename, conditional=True, etag=True, max_age=300)
             
     except Exception as e:
-        logging.error(f"Error serving resume file: {e}")
+        logging.error("Error serving resume file: %s", e)
         return "Error serving file", 500
 
+CSV_EXPORT_FIELDS = ['candidate_name', 'overall_score', 'tag', 'explanation', 'feedback']
+
+class _LineBuffer:
+    """File-like sink for csv.writer whose write() returns the formatted line instead of storing it"""
+    
+    def write(self, line):
+        return line
+
 @app.route('/api/export/<format>')
 def export_results(format):
     """API endpoint for exporting results in different formats"""
     try:
-        if DATABASE_TYPE == 'mysql':
-            cur = mysql.connection.cursor()
-            cur.execute("""
-                SELECT candidate_name, overall_score, tag, explanation, feedback 
-                FROM hr_resume_results 
-                ORDER BY overall_score DESC
-            """)
-            results_data = cur.fetchall()
-            cur.close()
-        else:
-            # Supabase query
-            supabase_manager = get_supabase_manager()
-            supabase_results = supabase_manager.get_all_results()
-            
-            # Convert to expected format
-            results_data = []
-            for result in supabase_results:
-                results_data.append({
-                    'candidate_name': result.get('candidate_name'),
-                    'overall_score': result.get('overall_score'),
-                    'tag': result.get('qualification_tag'),  # Map back to 'tag'
-                    'explanation': result.get('explanation'),
-                    'feedback': result.get('feedback'),
-                    'interview_questions': result.get('interview_questions', {})  # Include interview questions
-                })
+        session_id = session.get('eval_session_id')
 
         if format.lower() == 'json':
-            return jsonify(results_data)
+            # default=str covers the Decimal and date values MySQL rows can carry
+            return app.response_class(
+                orjson.dumps(fetch_session_results(session_id), default=str),
+                mimetype='application/json'
+            )
+        elif format.lower() == 'jsonl':
+            # One JSON object per line, streamed as pages come off the database
+            rows = _export_rows(session_id)
+            
+            def generate_jsonl():
+                for row in rows:
+                    yield orjson.dumps(row, default=str) + b'\n'
+            
+            return app.response_class(
+                stream_with_context(generate_jsonl()),
+                mimetype='application/x-ndjson',
+                headers={'Content-Disposition': 'attachment; filename=resume_evaluation_results.jsonl'}
+            )
         elif format.lower() == 'csv':
-            # Convert to CSV format
-            import io
-            import csv
+            # Stream the CSV one row at a time as pages come off the database
+            rows = _export_rows(session_id, columns=CSV_RESULT_COLUMNS)
             
-            output = io.StringIO()
-            writer = csv.DictWriter(output, fieldnames=['candidate_name', 'overall_score', 'tag', 'explanation', 'feedback'])
-            writer.writeheader()
-            writer.writerows(results_data)
+            def generate_csv():
+                writer = csv.writer(_LineBuffer())
+                yield '\ufeff' + writer.writerow(CSV_EXPORT_FIELDS)  # BOM so Excel reads UTF-8
+                for row in rows:
+                    yield writer.writerow([row.get(field) for field in CSV_EXPORT_FIELDS])
             
-            response = app.response_class(
-                output.getvalue(),
+            return app.response_class(
+                stream_with_context(generate_csv()),
                 mimetype='text/csv',
                 headers={'Content-Disposition': 'attachment; filename=resume_evaluation_results.csv'}
             )
-            return response
         else:
             return jsonify({'error': 'Unsupported format'}), 400
             
     except Exception as e:
-        logging.error(f"Error exporting results: {e}")
+        logging.error("Error exporting results: %s", e)
         return jsonify({'error': 'Export failed'}), 500
 
+VALID_TAGS = frozenset({'QUALIFIED', 'NOT QUALIFIED', 'OVERQUALIFIED'})
+
 def monitor_data_flow(resume_file, job_description_path, evaluation_result, processing_time):
     """
     Monitor and log the complete data flow for debugging and optimization
     """
+    score = evaluation_result.get('overall_score')
     flow_data = {
-        'timestamp': datetime.datetime.now().isoformat(),
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
         'resume_file': resume_file.filename if resume_file else 'N/A',
         'job_description_path': job_description_path,
         'processing_time_seconds': processing_time,
         'evaluation_summary': {
             'candidate_name': evaluation_result.get('candidate_name'),
-            'overall_score': evaluation_result.get('overall_score'),
+            'overall_score': score,
             'qualification_tag': evaluation_result.get('qualification_tag'),
             'has_interview_questions': bool(evaluation_result.get('interview_questions')),
             'has_category_scores': bool(evaluation_result.get('category_scores'))
         },
         'data_quality': {
             'name_extracted': bool(evaluation_result.get('candidate_name') and evaluation_result['candidate_name'] != 'Unknown'),
-            'score_valid': isinstance(evaluation_result.get('overall_score'), (int, float)) and 0 <= evaluation_result.get('overall_score', 0) <= 100,
-            'tag_valid': evaluation_result.get('qualification_tag') in ['QUALIFIED', 'NOT QUALIFIED', 'OVERQUALIFIED'],
+            'score_valid': isinstance(score, (int, float)) and 0 <= score <= 100,
+            'tag_valid': evaluation_result.get('qualification_tag') in VALID_TAGS,
             'recommendations_present': bool(evaluation_result.get('recommendations')),
             'strengths_present': bool(evaluation_result.get('strengths'))
         }
     }
     
-    # Log flow data
-    logging.info(f"Data flow monitoring: {json.dumps(flow_data, indent=2)}")
+    # Log flow data, serializing only when INFO is enabled
+    if logging.getLogger().isEnabledFor(logging.INFO):
+        logging.info("Data flow monitoring: %s", orjson.dumps(flow_data).decode())
     
-    # Store in session for debugging
-    if 'data_flow_log' not in session:
-        session['data_flow_log'] = []
-    session['data_flow_log'].append(flow_data)
+    # Keep a bounded trail on the app rather than in the session cookie
+    app.data_flow_log.append(flow_data)
     
     return flow_data
 
 if __name__ == "__main__":
     # Start the Flask application
     port = int(os.environ.get('PORT', 8000))
-    app.run(host='0.0.0.0', debug=False, port=port)
\ No newline at end of file
+    app.run(host='0.0.0.0', debug=os.getenv('FLASK_DEBUG') == '1', port=port, threaded=True)
\ No newline at end of file
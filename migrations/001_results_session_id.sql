@@ -0,0 +1,7 @@
+-- Scope evaluation results to the browser session that produced them (Supabase / Postgres)
+-- main_test.py clears and reads results by session_id instead of wiping the whole table
+-- session_id holds the id in the Flask session cookie, so it must not reference evaluation_sessions(id)
+ALTER TABLE resume_evaluation_results ADD COLUMN IF NOT EXISTS session_id UUID;
+
+CREATE INDEX IF NOT EXISTS idx_resume_evaluation_results_session
+    ON resume_evaluation_results (session_id, evaluated_at DESC);
@@ -0,0 +1,22 @@
+-- All dashboard statistics in one round-trip, used by SupabaseManager.get_statistics
+create or replace function get_eval_stats()
+returns table (
+    total int,
+    qualified int,
+    not_qualified int,
+    overqualified int,
+    avg_score numeric,
+    max_score numeric,
+    min_score numeric
+)
+language sql stable as $$
+    select
+        count(*)::int,
+        (count(*) filter (where qualification_tag = 'QUALIFIED'))::int,
+        (count(*) filter (where qualification_tag = 'NOT QUALIFIED'))::int,
+        (count(*) filter (where qualification_tag = 'OVERQUALIFIED'))::int,
+        avg(overall_score),
+        max(overall_score),
+        min(overall_score)
+    from resume_evaluation_results
+$$;
@@ -0,0 +1,10 @@
+-- Indexes for the statistics filters and the newest-first listings (Supabase / Postgres)
+-- CONCURRENTLY avoids locking writes while building, run each statement outside a transaction block
+create index concurrently if not exists idx_rer_qtag
+    on resume_evaluation_results (qualification_tag);
+
+create index concurrently if not exists idx_rer_qtag_score
+    on resume_evaluation_results (qualification_tag, overall_score);
+
+create index concurrently if not exists idx_rer_evaluated_at
+    on resume_evaluation_results (evaluated_at desc);
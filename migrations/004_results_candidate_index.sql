@@ -0,0 +1,5 @@
+-- Index for the per-candidate lookup in SupabaseManager.get_candidate_results (Supabase / Postgres)
+-- Session lookups are already covered by idx_resume_evaluation_results_session from 001
+-- CONCURRENTLY avoids locking writes while building, run outside a transaction block
+create index concurrently if not exists idx_rer_candidate_name
+    on resume_evaluation_results (candidate_name, evaluated_at desc);
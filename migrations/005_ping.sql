@@ -0,0 +1,6 @@
+-- Constant-time liveness probe, used by SupabaseManager.test_connection
+create or replace function ping()
+returns int
+language sql immutable as $$
+    select 1
+$$;
@@ -0,0 +1,32 @@
+-- Dashboard statistics precomputed once a minute, read by SupabaseManager.get_statistics
+-- when SUPABASE_STATS_VIEW=true. Counts may lag inserts by up to the refresh interval
+create materialized view if not exists eval_stats_mv as
+    select
+        1 as id,
+        count(*)::int as total,
+        (count(*) filter (where qualification_tag = 'QUALIFIED'))::int as qualified,
+        (count(*) filter (where qualification_tag = 'NOT QUALIFIED'))::int as not_qualified,
+        (count(*) filter (where qualification_tag = 'OVERQUALIFIED'))::int as overqualified,
+        avg(overall_score) as avg_score,
+        max(overall_score) as max_score,
+        min(overall_score) as min_score
+    from resume_evaluation_results;
+
+-- REFRESH ... CONCURRENTLY needs a unique index on a plain column
+create unique index if not exists idx_eval_stats_mv_id on eval_stats_mv (id);
+
+-- Refresh every minute with pg_cron, skipped where the extension is not enabled so the migration still applies
+-- Enable it under Database > Extensions and re-run this file to add the schedule, a named job is replaced not duplicated
+do $$
+begin
+    if exists (select 1 from pg_extension where extname = 'pg_cron') then
+        perform cron.schedule(
+            'refresh-eval-stats-mv',
+            '* * * * *',
+            'refresh materialized view concurrently eval_stats_mv'
+        );
+    else
+        raise notice 'pg_cron is not enabled, eval_stats_mv is only refreshed by hand';
+    end if;
+end
+$$;
@@ -0,0 +1,5 @@
+-- Scope evaluation results to the browser session that produced them (DATABASE_TYPE=mysql)
+-- main_test.py clears and reads results by session_id instead of truncating the table
+ALTER TABLE hr_resume_results
+    ADD COLUMN session_id CHAR(36) NULL,
+    ADD INDEX idx_hr_resume_results_session (session_id);
@@ -3,10 +3,16 @@ Supabase database manager for the Resume Evaluator application
 """
 import os
 import logging
-from typing import Dict, List, Any, Optional, Union
-import json
-from datetime import datetime
+import threading
+import time
+import httpx
+from functools import lru_cache
+from typing import Dict, Iterator, List, Any, Optional, Union
+import orjson
+from datetime import datetime, timezone
 from supabase import create_client, Client
+from supabase.lib.client_options import ClientOptions
+from postgrest.types import ReturnMethod
 from config import Config
 
 # Configure logging
@@ -14,6 +20,13 @@ logging.basicConfig(level=getattr(logging, Config.LOG_LEVEL),
                    format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+REQUIRED_FIELDS = frozenset({'candidate_name', 'overall_score', 'qualification_tag'})
+
+def _decode_json_with_orjson(response: httpx.Response):
+    """Response hook of the pooled PostgREST session, postgrest parses every result through response.json()"""
+    # The only place the REST client's JSON decoding is changed, response.json is the public decode method
+    response.json = lambda **kwargs: orjson.loads(response.read())
+
 class SupabaseManager:
     """Handles Supabase database operations"""
     
@@ -21,57 +34,102 @@ class SupabaseManager:
         """Initialize Supabase client"""
         self.supabase_url = Config.SUPABASE_URL
         self.supabase_key = Config.SUPABASE_KEY or Config.SUPABASE_ANON_KEY
+        self._read_cache: Dict[str, tuple] = {}  # key -> (monotonic time stored, value)
+        self._read_cache_lock = threading.Lock()
         
         if not self.supabase_url or not self.supabase_key:
             raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in environment variables")
         
         try:
-            self.client: Client = create_client(self.supabase_url, self.supabase_key)
+            # The per-client timeout supabase-py gives the PostgREST session, carried over by _use_pooled_session
+            options = ClientOptions(postgrest_client_timeout=Config.POOL_READ_TIMEOUT)
+            self.client: Client = create_client(self.supabase_url, self.supabase_key, options=options)
+            self._use_pooled_session()
             logger.info("Successfully connected to Supabase")
         except Exception as e:
             logger.error(f"Failed to connect to Supabase: {e}")
             raise
     
+    def _use_pooled_session(self):
+        """Swap the PostgREST session for one keep-alive pool sized from Config, keeping its other settings"""
+        postgrest = self.client.postgrest
+        default_session = postgrest.session
+        timeout = default_session.timeout
+        postgrest.session = httpx.Client(
+            base_url=default_session.base_url,
+            headers=default_session.headers,
+            cookies=default_session.cookies,
+            follow_redirects=default_session.follow_redirects,
+            http2=True,  # as postgrest's own create_session, which supabase-py builds the default session with
+            timeout=httpx.Timeout(
+                timeout.read, connect=Config.POOL_CONNECT_TIMEOUT, write=timeout.write, pool=Config.POOL_TIMEOUT
+            ),
+            limits=httpx.Limits(
+                max_connections=Config.POOL_MAX_CONNS,
+                max_keepalive_connections=Config.POOL_KEEPALIVE_CONNS,
+                keepalive_expiry=Config.POOL_KEEPALIVE_EXPIRY
+            ),
+            event_hooks={
+                'request': list(default_session.event_hooks['request']),
+                'response': [*default_session.event_hooks['response'], _decode_json_with_orjson]
+            }
+        )
+        default_session.close()
+    
+    def _cache_get(self, key: str) -> Any:
+        """Cached value of a read method, or None once older than SUPABASE_READ_CACHE_TTL"""
+        with self._read_cache_lock:
+            entry = self._read_cache.get(key)
+        if entry and time.monotonic() - entry[0] < Config.SUPABASE_READ_CACHE_TTL:
+            return entry[1]
+        return None
+    
+    def _cache_set(self, key: str, value: Any):
+        """Remember the value of a read method"""
+        with self._read_cache_lock:
+            self._read_cache[key] = (time.monotonic(), value)
+    
+    def _invalidate_cache(self):
+        """Drop cached reads after a write"""
+        with self._read_cache_lock:
+            self._read_cache.clear()
+    
     def test_connection(self) -> bool:
         """Test the Supabase connection"""
         try:
-            # Try a simple query to test connection
-            result = self.client.table('resume_evaluation_results').select('id').limit(1).execute()
+            # Constant-time round-trip (migrations/005_ping.sql), fall back to a one-row read
+            try:
+                self.client.rpc('ping').execute()
+            except Exception as e:
+                logger.warning(f"ping() unavailable, testing with a table read: {e}")
+                self.client.table('resume_evaluation_results').select('id').limit(1).execute()
             logger.info("Supabase connection test successful")
             return True
         except Exception as e:
             logger.error(f"Supabase connection test failed: {e}")
             return False
     
+    def _prepare_result(self, result_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Check the required fields of a result before inserting it, JSON fields arrive decoded"""
+        # Debug: Log the incoming data
+        logger.info(f"Inserting evaluation result for {result_data.get('candidate_name', 'Unknown')}")
+        logger.info(f"Interview questions in result_data: {result_data.get('interview_questions')}")
+        
+        # Ensure required fields are present
+        missing = REQUIRED_FIELDS - result_data.keys()
+        if missing:
+            raise ValueError(f"Missing required field: {', '.join(sorted(missing))}")
+        
+        return result_data
+    
     def insert_evaluation_result(self, result_data: Dict[str, Any]) -> Optional[str]:
         """Insert a single evaluation result"""
         try:
-            # Debug: Log the incoming data
-            logger.info(f"Inserting evaluation result for {result_data.get('candidate_name', 'Unknown')}")
-            logger.info(f"Interview questions in result_data: {result_data.get('interview_questions')}")
-            
-            # Convert any JSON fields to proper format
-            if 'extracted_skills' in result_data and isinstance(result_data['extracted_skills'], str):
-                result_data['extracted_skills'] = json.loads(result_data['extracted_skills'])
-            if 'previous_roles' in result_data and isinstance(result_data['previous_roles'], str):
-                result_data['previous_roles'] = json.loads(result_data['previous_roles'])
-            if 'certifications' in result_data and isinstance(result_data['certifications'], str):
-                result_data['certifications'] = json.loads(result_data['certifications'])
-            # Handle interview_questions field
-            if 'interview_questions' in result_data and isinstance(result_data['interview_questions'], str):
-                result_data['interview_questions'] = json.loads(result_data['interview_questions'])
-            
-            # Debug: Log after processing
-            logger.info(f"Interview questions after processing: {result_data.get('interview_questions')}")
-            
-            # Ensure required fields are present
-            required_fields = ['candidate_name', 'overall_score', 'qualification_tag']
-            for field in required_fields:
-                if field not in result_data:
-                    raise ValueError(f"Missing required field: {field}")
+            result_data = self._prepare_result(result_data)
             
             # Insert the record
             response = self.client.table('resume_evaluation_results').insert(result_data).execute()
+            self._invalidate_cache()
             
             if response.data:
                 inserted_id = response.data[0]['id']
@@ -86,14 +144,15 @@ class SupabaseManager:
             raise
     
     def insert_multiple_results(self, results: List[Dict[str, Any]]) -> List[str]:
-        """Insert multiple evaluation results"""
-        inserted_ids = []
+        """Insert multiple evaluation results in a single request"""
+        if not results:
+            return []
         
         try:
-            for result in results:
-                inserted_id = self.insert_evaluation_result(result)
-                if inserted_id:
-                    inserted_ids.append(inserted_id)
+            rows = [self._prepare_result(result) for result in results]
+            response = self.client.table('resume_evaluation_results').insert(rows).execute()
+            self._invalidate_cache()
+            inserted_ids = [row['id'] for row in response.data or []]
             
             logger.info(f"Successfully inserted {len(inserted_ids)} evaluation results")
             return inserted_ids
@@ -102,28 +161,58 @@ class SupabaseManager:
             logger.error(f"Error inserting multiple results: {e}")
             raise
     
-    def get_all_results(self) -> List[Dict[str, Any]]:
-        """Get all evaluation results"""
+    def get_all_results(self, columns: str = '*') -> List[Dict[str, Any]]:
+        """Get all evaluation results, optionally only the given comma-separated columns"""
         try:
-            response = self.client.table('resume_evaluation_results').select('*').order('evaluated_at', desc=True).execute()
+            response = self.client.table('resume_evaluation_results').select(columns).order('evaluated_at', desc=True).execute()
             return response.data
         except Exception as e:
             logger.error(f"Error fetching all results: {e}")
             return []
     
-    def get_results_by_session(self, session_id: str) -> List[Dict[str, Any]]:
-        """Get results for a specific session"""
+    def sample_results(self, n: int = 1) -> List[Dict[str, Any]]:
+        """Get up to n evaluation results, e.g. to inspect columns without loading the table"""
+        try:
+            response = self.client.table('resume_evaluation_results').select('*').range(0, n - 1).execute()
+            return response.data
+        except Exception as e:
+            logger.error(f"Error sampling results: {e}")
+            return []
+    
+    def iter_results(self, batch: int = 1000, session_id: Optional[str] = None,
+                     columns: str = '*') -> Iterator[Dict[str, Any]]:
+        """Yield all (or one session's) evaluation results newest first, fetching one page of batch rows at a time"""
+        offset = 0
+        while True:
+            query = self.client.table('resume_evaluation_results').select(columns)
+            if session_id is not None:
+                query = query.eq('session_id', session_id)
+            response = query.order(
+                'evaluated_at', desc=True
+            ).order('id').range(offset, offset + batch - 1).execute()
+            if not response.data:
+                return
+            yield from response.data
+            # Advance by what came back, PostgREST's max-rows can cap a page below batch without it being the last
+            offset += len(response.data)
+    
+    def get_results_by_session(self, session_id: str, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """Get a page of results for a specific session"""
         try:
-            response = self.client.table('resume_evaluation_results').select('*').eq('session_id', session_id).execute()
+            response = self.client.table('resume_evaluation_results').select('*').eq('session_id', session_id).order(
+                'evaluated_at', desc=True
+            ).range(offset, offset + limit - 1).execute()
             return response.data
         except Exception as e:
             logger.error(f"Error fetching results for session {session_id}: {e}")
             return []
     
-    def get_candidate_results(self, candidate_name: str) -> List[Dict[str, Any]]:
-        """Get all results for a specific candidate"""
+    def get_candidate_results(self, candidate_name: str, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """Get a page of results for a specific candidate"""
         try:
-            response = self.client.table('resume_evaluation_results').select('*').eq('candidate_name', candidate_name).execute()
+            response = self.client.table('resume_evaluation_results').select('*').eq('candidate_name', candidate_name).order(
+                'evaluated_at', desc=True
+            ).range(offset, offset + limit - 1).execute()
             return response.data
         except Exception as e:
             logger.error(f"Error fetching results for candidate {candidate_name}: {e}")
@@ -132,42 +221,96 @@ class SupabaseManager:
     def clear_all_results(self) -> bool:
         """Clear all evaluation results (use with caution)"""
         try:
-            response = self.client.table('resume_evaluation_results').delete().neq('id', '00000000-0000-0000-0000-000000000000').execute()
-            logger.info("Successfully cleared all evaluation results")
+            # Minimal return: PostgREST reports only the count instead of sending back every deleted row
+            response = self.client.table('resume_evaluation_results').delete(
+                count='exact', returning=ReturnMethod.minimal
+            ).neq('id', '00000000-0000-0000-0000-000000000000').execute()
+            self._invalidate_cache()
+            logger.info(f"Successfully cleared {response.count or 0} evaluation results")
             return True
         except Exception as e:
             logger.error(f"Error clearing results: {e}")
             return False
     
+    def clear_session_results(self, session_id: str) -> bool:
+        """Clear the evaluation results of one session, leaving other sessions' results alone"""
+        try:
+            response = self.client.table('resume_evaluation_results').delete(
+                count='exact', returning=ReturnMethod.minimal
+            ).eq('session_id', session_id).execute()
+            self._invalidate_cache()
+            logger.info(f"Successfully cleared {response.count or 0} evaluation results of session {session_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Error clearing results of session {session_id}: {e}")
+            return False
+    
+    def delete_results_by_name_pattern(self, pattern: str) -> int:
+        """Delete results whose candidate name matches a LIKE pattern (e.g. 'Test%') in one statement"""
+        try:
+            response = self.client.table('resume_evaluation_results').delete(
+                count='exact', returning=ReturnMethod.minimal
+            ).like('candidate_name', pattern).execute()
+            self._invalidate_cache()
+            deleted_count = response.count or 0
+            logger.info(f"Deleted {deleted_count} evaluation results matching {pattern!r}")
+            return deleted_count
+        except Exception as e:
+            logger.error(f"Error deleting results matching {pattern!r}: {e}")
+            return 0
+    
+    def _aggregate_statistics(self) -> Dict[str, Any]:
+        """Statistics computed client-side from one select, for databases without get_eval_stats()"""
+        response = self.client.table('resume_evaluation_results').select('qualification_tag, overall_score').execute()
+        tag_counts = {'QUALIFIED': 0, 'NOT QUALIFIED': 0, 'OVERQUALIFIED': 0}
+        scores = []
+        for row in response.data:
+            if row['qualification_tag'] in tag_counts:
+                tag_counts[row['qualification_tag']] += 1
+            if row['overall_score'] is not None:
+                scores.append(row['overall_score'])
+        return {
+            'total': len(response.data),
+            'qualified': tag_counts['QUALIFIED'],
+            'not_qualified': tag_counts['NOT QUALIFIED'],
+            'overqualified': tag_counts['OVERQUALIFIED'],
+            'avg_score': sum(scores) / len(scores) if scores else None,
+            'max_score': max(scores) if scores else None,
+            'min_score': min(scores) if scores else None
+        }
+    
     def get_statistics(self) -> Dict[str, Any]:
-        """Get evaluation statistics"""
+        """Get evaluation statistics, cached for SUPABASE_READ_CACHE_TTL seconds"""
+        cached = self._cache_get('stats')
+        if cached is not None:
+            return dict(cached)
+        
         try:
-            # Get total count
-            total_response = self.client.table('resume_evaluation_results').select('id', count='exact').execute()
-            total_count = total_response.count if total_response.count is not None else 0
-            
-            # Get qualified count
-            qualified_response = self.client.table('resume_evaluation_results').select('id', count='exact').eq('qualification_tag', 'QUALIFIED').execute()
-            qualified_count = qualified_response.count if qualified_response.count is not None else 0
-            
-            # Get not qualified count
-            not_qualified_response = self.client.table('resume_evaluation_results').select('id', count='exact').eq('qualification_tag', 'NOT QUALIFIED').execute()
-            not_qualified_count = not_qualified_response.count if not_qualified_response.count is not None else 0
+            stats = None
+            if Config.SUPABASE_STATS_VIEW:
+                # Precomputed single row (migrations/006_eval_stats_mv.sql)
+                try:
+                    stats = self.client.table('eval_stats_mv').select('*').execute().data[0]
+                except Exception as e:
+                    logger.warning(f"eval_stats_mv unavailable, using get_eval_stats(): {e}")
             
-            # Get overqualified count
-            overqualified_response = self.client.table('resume_evaluation_results').select('id', count='exact').eq('qualification_tag', 'OVERQUALIFIED').execute()
-            overqualified_count = overqualified_response.count if overqualified_response.count is not None else 0
+            if stats is None:
+                # All aggregates in one round-trip (migrations/002_get_eval_stats.sql)
+                try:
+                    stats = self.client.rpc('get_eval_stats').execute().data[0]
+                except Exception as e:
+                    logger.warning(f"get_eval_stats() unavailable, aggregating client-side: {e}")
+                    stats = self._aggregate_statistics()
             
-            # Get average score
-            avg_response = self.client.table('resume_evaluation_results').select('overall_score').execute()
-            scores = [result['overall_score'] for result in avg_response.data if result['overall_score'] is not None]
-            average_score = sum(scores) / len(scores) if scores else 0
+            total_count = stats['total'] or 0
+            qualified_count = stats['qualified'] or 0
+            not_qualified_count = stats['not_qualified'] or 0
+            overqualified_count = stats['overqualified'] or 0
+            average_score = float(stats['avg_score'] or 0)
+            highest_score = stats['max_score'] or 0
+            lowest_score = stats['min_score'] or 0
             
-            # Get highest and lowest scores
-            highest_score = max(scores) if scores else 0
-            lowest_score = min(scores) if scores else 0
-            
-            return {
+            statistics = {
                 'total_candidates': total_count,
                 'qualified_count': qualified_count,
                 'not_qualified_count': not_qualified_count,
@@ -176,6 +319,8 @@ class SupabaseManager:
                 'highest_score': highest_score,
                 'lowest_score': lowest_score
             }
+            self._cache_set('stats', statistics)
+            return dict(statistics)
             
         except Exception as e:
             logger.error(f"Error getting statistics: {e}")
@@ -193,6 +338,7 @@ class SupabaseManager:
         """Create a new evaluation session"""
         try:
             response = self.client.table('evaluation_sessions').insert(session_data).execute()
+            self._invalidate_cache()
             if response.data:
                 session_id = response.data[0]['id']
                 logger.info(f"Created evaluation session: {session_id}")
@@ -207,9 +353,10 @@ class SupabaseManager:
         try:
             update_data = {'status': status, **kwargs}
             if status == 'completed':
-                update_data['completed_at'] = datetime.utcnow().isoformat()
+                update_data['completed_at'] = datetime.now(timezone.utc).isoformat(timespec='seconds')
             
             response = self.client.table('evaluation_sessions').update(update_data).eq('id', session_id).execute()
+            self._invalidate_cache()
             logger.info(f"Updated session {session_id} status to {status}")
             return True
         except Exception as e:
@@ -226,23 +373,36 @@ class SupabaseManager:
             return None
     
     def get_all_sessions(self) -> List[Dict[str, Any]]:
-        """Get all evaluation sessions"""
+        """Get all evaluation sessions, cached for SUPABASE_READ_CACHE_TTL seconds"""
+        cached = self._cache_get('sessions')
+        if cached is not None:
+            return list(cached)
+        
         try:
             response = self.client.table('evaluation_sessions').select('*').order('started_at', desc=True).execute()
-            return response.data
+            self._cache_set('sessions', response.data)
+            return list(response.data)
         except Exception as e:
             logger.error(f"Error fetching all sessions: {e}")
             return []
 
-# Global instance
-supabase_manager = None
+# Process-wide instance, the lock keeps concurrent first calls from connecting twice
+_supabase_manager_lock = threading.Lock()
+
+@lru_cache(maxsize=1)
+def _create_supabase_manager() -> SupabaseManager:
+    """Create the shared Supabase manager"""
+    return SupabaseManager()
 
 def get_supabase_manager() -> SupabaseManager:
     """Get or create Supabase manager instance"""
-    global supabase_manager
-    if supabase_manager is None:
-        supabase_manager = SupabaseManager()
-    return supabase_manager
+    if _create_supabase_manager.cache_info().currsize:
+        return _create_supabase_manager()
+    with _supabase_manager_lock:
+        return _create_supabase_manager()
+
+# Drop the cached instance, e.g. between tests or after changing credentials
+get_supabase_manager.cache_clear = _create_supabase_manager.cache_clear
 
 def test_supabase_connection() -> bool:
     """Test Supabase connection"""